@@ -2,55 +2,182 @@ from agent_simulator.elements.Event import Event
 from agent_simulator.elements.Contact import Contact
 from agent_simulator.elements.Line import Line
 from agent_simulator.elements.Agent import Agent
-from agent_simulator.elements.Log import Log 
+from agent_simulator.elements.Log import Log, LOG_OFF, LOG_FULL
 
 from agent_simulator.collections.AgentPool import AgentPool
 from agent_simulator.collections.EventQueue import EventQueue
+from agent_simulator.collections.ArrivalStream import ArrivalStream
+from agent_simulator.collections.WaitingQueue import WaitingQueue
+
+from simulation_tools.replications import run_replications
+from simulation_tools.contact_store import ContactStore
+from simulation_tools.kpis import KpiAccumulator, DiscardedRecords
+from simulation_tools.profiling import Profiler
 
 import numpy as np
-import random, bisect, math
+import math, functools, itertools
+
+# Columns of the ContactStores used for handled/missed contacts when compact=True
+HANDLED_FIELDS = [
+    ('id', 'int'),
+    ('arrival', 'float'),
+    ('waiting_time', 'float'),
+    ('handling_time', 'float'),
+    ('patience', 'float'),
+    ('status', 'category'),
+    ('contact_type', 'category'),
+    ('concurrency_at_arrival', 'int'),
+    ('agent', 'category'),
+    ('solved_at', 'float')
+]
+MISSED_FIELDS = [
+    ('id', 'int'),
+    ('arrival', 'float'),
+    ('waiting_time', 'float'),
+    ('patience', 'float'),
+    ('status', 'category'),
+    ('contact_type', 'category'),
+    ('missed_at', 'float')
+]
+
+# Tie-breaking of the simulation calendar: events at the same time are processed by ascending priority, then in
+# the order they were scheduled
+EVENT_PRIORITIES = {
+    'agent-out': 0,
+    'agent-in': 1,
+    'arrival': 2,
+    'handling': 3
+}
+
+def _handled_row(record:dict) -> tuple:
+    c = record['contact']
+    return (
+        c.id, c.arrival, c.waiting_time, c.handling_time, c.patience, c.status, 
+        c.contact_type, c.concurrency_at_arrival, record['agent'].id, record['solved_at']
+    )
+
+def _missed_row(record:dict) -> tuple:
+    c = record['contact']
+    return (c.id, c.arrival, c.waiting_time, c.patience, c.status, c.contact_type, record['missed_at'])
 
 class AgentSimulation:
     def __init__(
         self,
-        contact_types:dict = None
+        contact_types:dict = None,
+        seed:int = None,
+        compact:bool = False,
+        service_time:float = None,
+        kpi_interval:float = 60,
+        keep_records:bool = True,
+        log_level:int = LOG_FULL,
+        log_dir:str = None,
+        event_priorities:dict = None
     ):
         #Attributes
+        self.rng = np.random.default_rng(seed) # seed: int, SeedSequence or an injected Generator
+        self.compact = compact # Store handled/missed contacts in ContactStores instead of lists of records
+        self.service_time = service_time # Service level threshold of the streaming KPIs
+        self.kpi_interval = kpi_interval # Interval length of the streaming KPIs breakdown
+        self.keep_records = keep_records # If False, handled/missed contacts are only counted (see 'kpi_accumulator')
+        self.log_level = log_level # LOG_OFF, LOG_KPI or LOG_FULL
+        self.log_dir = log_dir # If set, the simulation log is spilled to .npy chunks under this directory
+        self.event_priorities = dict(event_priorities if event_priorities else EVENT_PRIORITIES) # Calendar tie-breaking
         self.contact_types=contact_types if contact_types else dict()
-        self.agent_pool = AgentPool()
+        self.agent_pool = AgentPool(rng=self.rng)
         self.agent_io_queue = None
 
         #Simulation Carries
-        self.arrival_queue = EventQueue(fifo=True)
-        self.handling_queue = EventQueue(fifo=False)
-        self.waiting_queue = EventQueue(fifo=True)
+        self.arrival_queue = EventQueue(fifo=False) # Arrival events added by hand, served by time
+        self.arrival_streams = list() # ArrivalStreams created by 'add_arrivals'
+        self.contacts_created = 0 # Contact ids are assigned per simulation, restarting at 'reset_simulation'
+        self.calendar = EventQueue(fifo=False, priorities=self.event_priorities) # Pending events of the simulation
+        self.waiting_queue = WaitingQueue()
+        self._handling_events = dict() # Line -> handling Event
+        self._relogins = set() # agent-out Events followed by an agent-in of the same agent at the same time
         
         #Outputs
-        self.handled_contacts = list() # of Contacts
-        self.missed_contacts = list() # of Contacts
+        self.handled_contacts = self._new_output(HANDLED_FIELDS, _handled_row) # of handling records
+        self.missed_contacts = self._new_output(MISSED_FIELDS, _missed_row) # of missed records
+        self.kpi_accumulator = KpiAccumulator(service_time, interval=kpi_interval)
         self.simulation_log = None
+        self.profiler = None # Set by 'enable_profiling'
         
 
     # Reset
     def reset_simulation(self):
-        self.waiting_queue = EventQueue(fifo=True)
-        self.handling_queue = EventQueue(fifo=False)
+        self.waiting_queue = WaitingQueue()
+        self.calendar = EventQueue(fifo=False, priorities=self.event_priorities)
         self.arrival_queue = EventQueue(fifo=False)
-        self.handled_contacts = list()
-        self.missed_contacts = list()
+        self.arrival_streams = list()
+        self.contacts_created = 0
+        self._handling_events = dict()
+        self._relogins = set()
+        self.handled_contacts = self._new_output(HANDLED_FIELDS, _handled_row)
+        self.missed_contacts = self._new_output(MISSED_FIELDS, _missed_row)
+        self.kpi_accumulator = KpiAccumulator(self.service_time, interval=self.kpi_interval)
         self.agent_io_queue = None
+        for agent in self.agent_pool.agents:
+            agent.reset_time_counters()
 
     def reset_agents(self):
         self.agent_pool.reset()
         
+    def _new_output(self, fields:list, row):
+        if not self.keep_records:
+            return DiscardedRecords()
+        return ContactStore(fields, row) if self.compact else list()
+
+    def _output_column(self, output, name:str) -> np.ndarray:
+        if self.compact:
+            return output.column(name)
+        if name in ('agent', 'solved_at', 'missed_at'):
+            return np.array([r[name].id if name == 'agent' else r[name] for r in output])
+        return np.array([getattr(r['contact'], name) for r in output])
+        
     def get_handled(self) -> list:
-        return [r['contact'] for r in self.handled_contacts]
+        """
+            Usage: Handled contacts, as Contacts (or as dictionaries of the stored columns if compact=True).
+        """
+        return self.handled_contacts.to_dicts() if self.compact else [r['contact'] for r in self.handled_contacts]
     
     def get_missed(self) -> list:
-        return [r['contact'] for r in self.missed_contacts]
+        """
+            Usage: Missed contacts, as Contacts (or as dictionaries of the stored columns if compact=True).
+        """
+        return self.missed_contacts.to_dicts() if self.compact else [r['contact'] for r in self.missed_contacts]
     
     def get_solved(self) -> list:
         return [*self.get_handled(),*self.get_missed()] 
+
+    def get_kpis(self, service_time:float) -> dict:
+        """
+            Usage: KPIs of the last simulation.
+            Arguments:
+            -service_time: waiting time threshold for the service level. If records are not kept, the service level
+            comes from 'kpi_accumulator' (exact for the simulation's own 'service_time', estimated otherwise).
+            Returns: dictionary with 'service_level' (handled within 'service_time' / offered), 'abandonment_rate'
+            (abandoned / offered), 'asa' (average waiting time of handled contacts) and 'occupancy' (time agents spent
+            with at least one contact while logged in / logged in time).
+        """
+        logged_time = sum(agent.logged_time for agent in self.agent_pool.agents)
+        busy_time = sum(agent.busy_time for agent in self.agent_pool.agents)
+        occupancy = busy_time / logged_time if logged_time else float('nan')
+        if not self.keep_records:
+            kpis = self.kpi_accumulator.kpis(service_time)
+            return {
+                'service_level': kpis['service_level'],
+                'abandonment_rate': kpis['abandonment_rate'],
+                'asa': kpis['asa'],
+                'occupancy': occupancy
+            }
+        waiting_times = self._output_column(self.handled_contacts, 'waiting_time').astype(float)
+        offered = len(self.handled_contacts) + len(self.missed_contacts)
+        return {
+            'service_level': float(np.sum(waiting_times <= service_time) / offered) if offered else float('nan'),
+            'abandonment_rate': float(np.sum(self._output_column(self.missed_contacts, 'status') == 'abandoned') / offered) if offered else float('nan'),
+            'asa': float(waiting_times.mean()) if len(waiting_times) else float('nan'),
+            'occupancy': occupancy
+        }
          
     # Add and Remove Contact Types
     def add_contact_type(
@@ -88,14 +215,55 @@ class AgentSimulation:
     def list_contact_types(self) -> list:
         return list(self.contact_types.keys())
     
+    #PROFILING
+    def enable_profiling(self, sample_every:int=1) -> Profiler:
+        """
+            Usage: Instrument this simulation (see simulation_tools.Profiler). Times '_process_arrival',
+            '_process_handling' and '_process_agent_io' (their call counts are the processed events by type),
+            '_check_waiting', 'AgentPool.find_best_avail_agent' and 'Log.log_action', and samples the calendar,
+            handling and waiting queue lengths before every 'sample_every'-th event. Only the instance is patched:
+            nothing is instrumented before this call or after 'disable_profiling'.
+        """
+        self.disable_profiling()
+        self.profiler = Profiler(sample_every)
+        sample = self.profiler.sampler(self._queue_lengths)
+        for name in ('_process_arrival', '_process_handling', '_process_agent_io'):
+            self.profiler.wrap(self, name, before=sample)
+        self.profiler.wrap(self, '_check_waiting')
+        self.profiler.wrap(self.agent_pool, 'find_best_avail_agent')
+        return self.profiler
+
+    def disable_profiling(self) -> Profiler:
+        profiler, self.profiler = self.profiler, None
+        if profiler:
+            profiler.detach()
+        return profiler
+
+    def _queue_lengths(self, event:Event) -> tuple:
+        lengths = {
+            'calendar': self.calendar.length + 1, # 'event' was just taken from the calendar
+            'handling': len(self._handling_events),
+            'waiting': self.waiting_queue.length
+        }
+        return event.time, lengths
+
     #SIMULATION PROCESSES
     
     ### MAIN PROCESS: SIMULATE NEXT
     def simulate(self) -> Log:
+        """
+            Usage: Run the simulation of the arrival queue, arrival streams and agent IO queue. They are fed into a
+            single calendar (also holding the handling completions), which dispatches events by time, then by 'event_priorities' (e.g.
+            agents log out before arrivals at the same time), then in scheduling order. Agent IO events without an agent
+            are bound to agents before dispatching (see '_bind_agent_io'), so 'event_priorities' can't change coverage.
+            An agent logged out and back in at the same time is processed out then in, right after each other.
+        """
         self.simulation_log = Log({
             'contact_types': self.contact_types,
             'agent_pool': self.agent_pool
-        })
+        }, level=self.log_level, spill_dir=self.log_dir)
+        if self.profiler:
+            self.profiler.wrap(self.simulation_log, 'log_action')
 
         
         self.simulation_log.log_action(
@@ -107,19 +275,33 @@ class AgentSimulation:
 
         #self.simulation_log.log_action(time = xxx, action = 'xxx', item_type = 'xxx', item_id = xxx))
         
-        while(1):
-            queues = (self.agent_io_queue, self.arrival_queue, self.handling_queue)
-        
-            next_queue = min(queues, key=lambda q: q.next.time if q.next else float('inf') )
-            event = next_queue.next
-            if event == None:
-                break
+        #Agent IO is scheduled upfront. Every arrival source (queue or stream) has a single arrival in the calendar
+        #and is pulled for the next one when it is dispatched, which keeps the calendar as small as the events in flight
+        calendar = self.calendar
+        pending_arrivals = dict() # arrival Event -> source
+        def pull(source):
+            if source.length:
+                event = source.get_next_event()
+                pending_arrivals[event] = source
+                calendar.add_event(event)
+        agent_io = list()
+        while self.agent_io_queue is not None and self.agent_io_queue.length:
+            agent_io.append(self.agent_io_queue.get_next_event())
+        bound, self._relogins = self._bind_agent_io(agent_io)
+        for event in bound:
+            calendar.add_event(event)
+        for source in (self.arrival_queue, *self.arrival_streams):
+            pull(source)
+
+        while(calendar.length):
+            event = calendar.get_next_event()
             if event.event_type == "arrival":
-                self._process_arrival()
+                pull(pending_arrivals.pop(event))
+                self._process_arrival(event)
             elif event.event_type == "handling":
-                self._process_handling()
+                self._process_handling(event)
             else:
-                self._process_agent_io()
+                self._process_agent_io(event)
 
         self.simulation_log.log_action(
             time = 0, 
@@ -127,14 +309,14 @@ class AgentSimulation:
             item_type = 'simulation', 
             item_id = f'sim-{self.simulation_log.simulation_timestamp}'
         )
+        self.simulation_log.flush()
 
         return self.simulation_log
 
 
     ### SUB PROCESS: ARRIVAL
-    def _process_arrival(self):
-        #Extract Event and Contact
-        event = self.arrival_queue.get_next_event()
+    def _process_arrival(self, event:Event):
+        #Extract Contact
         present = event.time
         #print("Process Arrival at",present, event.item)
         contact = event.item
@@ -160,17 +342,15 @@ class AgentSimulation:
             old_aht = ct_aht.get('base') + (agent.occupied_lines - 1) * ct_aht.get('increment')
             new_aht = ct_aht.get('base') + (conc - 1) * ct_aht.get('increment')
             factor = new_aht / old_aht
-            lines_to_update = agent.get_occupied_lines()
-            for l in lines_to_update:
-                l.contact.update_handling(present, factor, conc)
-                self.simulation_log.log_action(time = present, action = 'updated_handling', item_type = 'contact', item_id = l.contact.id)
+            self._rekey_agent_lines(agent, present, factor, conc)
             
             #Occypy Line
-            occupied_line = agent.occupy_line(contact)
+            occupied_line = agent.occupy_line(contact, time=present)
             
             #Add line to Handling Queue
             handling_event = Event(occupied_line,'handling', time_callback=lambda l: round(l.contact.end_at,2))
-            self.handling_queue.add_event(handling_event)
+            self._handling_events[occupied_line] = handling_event
+            self.calendar.add_event(handling_event)
         
         else:
             #print("Contact Waiting...")
@@ -179,9 +359,8 @@ class AgentSimulation:
             self.simulation_log.log_action(time = present, action = 'contact_waiting', item_type = 'contact', item_id = contact.id)
 
     ### SUB PROCESS: HANDLING
-    def _process_handling(self)->None:
-        #Extract Event, Line and Contact
-        event = self.handling_queue.get_next_event()
+    def _process_handling(self, event:Event)->None:
+        #Extract Line and Contact
         present = event.time
         #print("Process Handling at",present)
         line = event.item
@@ -191,10 +370,12 @@ class AgentSimulation:
         ct_aht = self.contact_types.get(ct)
         
         #Free Line
-        agent.clear_line(line)
+        del self._handling_events[line]
+        agent.clear_line(line, time=present)
         
         #Add Contact to Handled Contacts
         self.handled_contacts.append({'contact':contact,'agent':agent,'solved_at': present})
+        self.kpi_accumulator.add_handled(contact.arrival, contact.waiting_time, present - contact.start_at)
         self.simulation_log.log_action(time = present, action = 'contact_handled', item_type = 'contact', item_id = contact.id)
         self.simulation_log.log_action(time = present, action = 'agent_line_freed', item_type = 'agent', item_id = agent.id)
         
@@ -203,106 +384,155 @@ class AgentSimulation:
         old_aht = ct_aht.get('base') + (agent.occupied_lines) * ct_aht.get('increment')
         new_aht = ct_aht.get('base') + (conc - 1) * ct_aht.get('increment')
         factor = new_aht / old_aht
-        lines_to_update = agent.get_occupied_lines()
-        for l in lines_to_update:
-                l.contact.update_handling(present, factor, conc)
-                self.simulation_log.log_action(time = present, action = 'updated_handling', item_type = 'contact', item_id = l.contact.id)
+        self._rekey_agent_lines(agent, present, factor, conc)
 
         self._check_waiting(agent, present)
     
     ### SUB PROCESS: AGENT IO
-    def _process_agent_io(self)->None:
-        #Extract Event & Agent
-        event = self.agent_io_queue.get_next_event()
+    def _process_agent_io(self, event:Event)->None:
+        #Extract Agent
         type = event.event_type
         present = event.time
         #print("Process Agent IO at",present)
-        agent = event.item
-        if agent == None:
-            #print(f"Random pick for {type}")
-            agent = self.agent_pool.sample_disabled() if type == 'agent-in' else self.agent_pool.find_earliest_in()
+        agent = event.item # Bound by '_bind_agent_io'
     
         #Process Agent Out
         if type == 'agent-out':
-            agent.disable_lines()
+            agent.disable_lines(time=present)
             self.simulation_log.log_action(time = present, action = 'agent_out', item_type = 'agent', item_id = agent.id)
+            if event in self._relogins:
+                #Logged back in at the same time: process the agent-in right away
+                self._relogins.discard(event)
+                type = 'agent-in'
         
         #Process Agent In
-        elif type == 'agent-in':
+        if type == 'agent-in':
             agent.enable_lines(time=present)
             self.simulation_log.log_action(time = present, action = 'agent_in', item_type = 'agent', item_id = agent.id)
             #Check Waiting
             self._check_waiting(agent, present)
     
+    def _bind_agent_io(self, events:list)->tuple:
+        """
+            Usage: Bind agent IO events without an agent (e.g. from 'generate_io_from_coverage') to agents, replaying
+            the logins of 'events' (in time order) on the pool: agent-in picks a random logged out agent, agent-out the
+            earliest logged in agent. At equal times outs are bound before ins, and an in avoids agents logged out at
+            that same time when it can, so the dispatching order of 'event_priorities' never matters. An out and an in
+            of the same agent at the same time are merged into the agent-out event, which is followed by the agent-in
+            when dispatched (see '_process_agent_io').
+            Returns: (the bound events in time order, set of the agent-out events followed by an agent-in)
+        """
+        pool = self.agent_pool
+        logged_in = {agent: agent.last_in for agent in pool.agents if not agent.disabled} # agent -> login time
+        bound, relogins = list(), set()
+        for present, group in itertools.groupby(events, key=lambda e: e.time):
+            group = list(group)
+            logged_out = dict() # agents logged out at 'present' -> their login time
+            for event in (e for e in group if e.event_type == 'agent-out'):
+                agent = event.item
+                if agent is None:
+                    agent = min((a for a in pool.agents if a in logged_in), key=logged_in.get, default=None)
+                if agent is None or agent not in logged_in:
+                    print(f"AgentSimulation | No logged in agent for agent-out at {present}.")
+                    continue
+                logged_out[agent] = logged_in.pop(agent)
+            logged_back = list()
+            for event in (e for e in group if e.event_type == 'agent-in'):
+                agent = event.item
+                if agent is None:
+                    available = [a for a in pool.agents if a not in logged_in and a not in logged_out]
+                    agent = pool.sample(available if available else [a for a in logged_out if a not in logged_back])
+                if agent is None or agent in logged_in:
+                    print(f"AgentSimulation | No logged out agent for agent-in at {present}.")
+                    continue
+                if agent in logged_out:
+                    logged_back.append(agent)
+                    logged_in[agent] = present
+                else:
+                    logged_in[agent] = present
+                    bound.append(Event(item=agent, event_type='agent-in', time=present))
+            for agent in logged_out:
+                bound.append(Event(item=agent, event_type='agent-out', time=present))
+                if agent in logged_back:
+                    relogins.add(bound[-1])
+            bound.extend(e for e in group if e.event_type not in ('agent-out', 'agent-in'))
+        return bound, relogins
+
+    def _rekey_agent_lines(self, agent:Agent, present:float, factor:float, conc:int)->None:
+        #Concurrency of 'agent' changed: rescale the remaining handling of its occupied lines and move only
+        #their handling events in the heap (at most one re-key per agent line)
+        for l in agent.get_occupied_lines():
+            l.contact.update_handling(present, factor, conc)
+            self.calendar.update_event(self._handling_events[l])
+            self.simulation_log.log_action(time = present, action = 'updated_handling', item_type = 'contact', item_id = l.contact.id)
+
     def _check_waiting(self, agent:Agent, present:int)->None:
         lines = [*agent.lines]
-        random.shuffle(lines)
+        self.rng.shuffle(lines)
         self.simulation_log.log_action(time = present, action = 'check_waiting_queue', item_type = 'agent', item_id = agent.id)
         for line in sorted(lines, key=lambda l:l.priority):
                 if (agent.disabled==False) & (line.is_occupied == False) & line.open & ((line.max_occ > agent.occupied_lines) if line.max_occ else True):
-                    cond = lambda e: e.item.contact_type  in line.contact_types
+                    waiting_event = self.waiting_queue.get_cond_next_event(
+                        line.contact_types, 
+                        present = present, 
+                        on_expired = self._process_missed
+                    )
                     
-                    while(1):
-                        waiting_event = self.waiting_queue.get_cond_next_event(cond)
-                        
-                        #BREAK IF NO WAITING EVENT
-                        if not bool(waiting_event):
-                            break
-
-                        contact = waiting_event.item
-
-                        #CHECK IF MISSED
-                        if contact.check_missed(present):
-                            contact.materialise_handling(present, None, None)
-                            #Add Contact to Missed Contacts
-                            self.missed_contacts.append({'contact':contact, 'missed_at': contact.arrival + contact.waiting_time})
-                            self.simulation_log.log_action(
-                                time = contact.arrival + contact.waiting_time, 
-                                action = 'contact_missed', 
-                                item_type = 'contact', 
-                                item_id = contact.id
-                            )
-                            #...and check waiting queue again
-                        else:
-                            #Materialise Handling
-                            ct = contact.contact_type
-                            ct_aht = self.contact_types.get(ct)
-                            conc = agent.occupied_lines + 1
-                            start = present
-                            aht = agent.performance_factor * (ct_aht.get('base') + (conc - 1) * ct_aht.get('increment'))
-                            contact.materialise_handling(start, aht, conc)
-    
-                            self.simulation_log.log_action(
-                                time = present, 
-                                action = 'materialised_handling', 
-                                item_type = 'contact', 
-                                item_id = contact.id
-                            )
-                            
-                            self.simulation_log.log_action(
-                                time = present, 
-                                action = 'agent_line_occupied', 
-                                item_type = 'agent', 
-                                item_id = agent.id
-                            )
-                            
-                            #Update Handling
-                            old_aht = ct_aht.get('base') + (agent.occupied_lines - 1) * ct_aht.get('increment')
-                            new_aht = ct_aht.get('base') + (conc - 1) * ct_aht.get('increment')
-                            factor = new_aht / old_aht
-                            lines_to_update = agent.get_occupied_lines()
-                            for l in lines_to_update:
-                                l.contact.update_handling(present, factor, conc)
-                                self.simulation_log.log_action(time = present, action = 'updated_handling', item_type = 'contact', item_id = l.contact.id)
-    
-                            #Occypy Line
-                            occupied_line = agent.occupy_line(contact,specific_line=line)
-                
-                            #Add line to Handling Queue
-                            handling_event = Event(line,'handling', time_callback=lambda l: round(l.contact.end_at,2))
-                            self.handling_queue.add_event(handling_event)
-
-                            break
+                    #SKIP IF NO WAITING EVENT
+                    if not bool(waiting_event):
+                        continue
+
+                    contact = waiting_event.item
+
+                    #Materialise Handling
+                    ct = contact.contact_type
+                    ct_aht = self.contact_types.get(ct)
+                    conc = agent.occupied_lines + 1
+                    start = present
+                    aht = agent.performance_factor * (ct_aht.get('base') + (conc - 1) * ct_aht.get('increment'))
+                    contact.materialise_handling(start, aht, conc)
+
+                    self.simulation_log.log_action(
+                        time = present, 
+                        action = 'materialised_handling', 
+                        item_type = 'contact', 
+                        item_id = contact.id
+                    )
+                    
+                    self.simulation_log.log_action(
+                        time = present, 
+                        action = 'agent_line_occupied', 
+                        item_type = 'agent', 
+                        item_id = agent.id
+                    )
+                    
+                    #Update Handling
+                    old_aht = ct_aht.get('base') + (agent.occupied_lines - 1) * ct_aht.get('increment')
+                    new_aht = ct_aht.get('base') + (conc - 1) * ct_aht.get('increment')
+                    factor = new_aht / old_aht
+                    self._rekey_agent_lines(agent, present, factor, conc)
+
+                    #Occypy Line
+                    occupied_line = agent.occupy_line(contact,specific_line=line, time=present)
+        
+                    #Add line to Handling Queue
+                    handling_event = Event(line,'handling', time_callback=lambda l: round(l.contact.end_at,2))
+                    self._handling_events[line] = handling_event
+                    self.calendar.add_event(handling_event)
+
+    def _process_missed(self, waiting_event:Event, present:float)->None:
+        #Contacts discarded from the waiting queue (patience or auto-solve time expired)
+        contact = waiting_event.item
+        contact.materialise_handling(present, None, None)
+        #Add Contact to Missed Contacts
+        self.missed_contacts.append({'contact':contact, 'missed_at': contact.arrival + contact.waiting_time})
+        self.kpi_accumulator.add_missed(contact.arrival, contact.status)
+        self.simulation_log.log_action(
+            time = contact.arrival + contact.waiting_time, 
+            action = 'contact_missed', 
+            item_type = 'contact', 
+            item_id = contact.id
+        )
     
 
     #AGENT IO ---------------------------------
@@ -364,33 +594,30 @@ class AgentSimulation:
         return agent_io_queue
 
     #ARRIVALS ---------------------------------
-    def add_arrivals(self, volumes:list=[5,10,5], contact_type:str='basic',interval:int=60, attempts:int=4)->EventQueue:
-        arrival_queue = self.arrival_queue
-        T = interval
-        curr_time = 0
-        total_volumes = sum(volumes)
-        results = []
-        for _ in range(attempts):
-            arrivals = []
-            for idx,f in enumerate(volumes):
-                curr_time = T*idx
-                average_time_between = T / f    
-                while(curr_time < (T * (idx+1))):
-                    curr_time = curr_time + np.random.exponential(scale=average_time_between)
-                    arrivals.append(curr_time) if curr_time < (T * (idx+1)) else None
-            results.append(arrivals)
-        best_attempt =  min(results, key=lambda a: abs(len(a) - total_volumes))
-        events = []
-        for a in best_attempt:
-            patience = self.contact_types.get(contact_type,{}).get('average_patience', None)
-            auto_solve = self.contact_types.get(contact_type,{}).get('auto_solve_time', None)
-            contact = Contact(arrival=a, contact_type=contact_type, average_patience=patience, auto_solve_time=auto_solve)
-            e = Event(item=contact, event_type='arrival', time_callback=lambda c: c.arrival)
-            bisect.insort(events, e, key=lambda e: e.time)
-        for e in events:
-            arrival_queue.add_event(e)
-        arrival_queue.sort()
-        return arrival_queue
+    def add_arrivals(self, volumes:list=[5,10,5], contact_type:str='basic',interval:int=60, attempts:int=None, intervals:int=None)->ArrivalStream:
+        """
+            Usage: Add the arrivals of a contact type, generated lazily while simulating (see ArrivalStream).
+            Arguments:
+            -volumes: contacts per interval, matched exactly (fractional volumes are rounded at random), or a
+            simulation_tools.RateProfile (non-homogeneous Poisson arrivals).
+            -contact_type: contact type of the arrivals, its patience and auto-solve time are read from contact_types.
+            -interval: interval length.
+            -attempts: Deprecated, ignored (volumes no longer need several candidate draws).
+            -intervals: Optional, number of intervals generated from a RateProfile (see ArrivalStream).
+        """
+        stream = ArrivalStream(
+            volumes,
+            interval,
+            contact_type=contact_type,
+            average_patience=self.contact_types.get(contact_type,{}).get('average_patience', None),
+            auto_solve_time=self.contact_types.get(contact_type,{}).get('auto_solve_time', None),
+            rng=self.rng,
+            intervals=intervals,
+            first_id=self.contacts_created
+        )
+        self.contacts_created += stream.length
+        self.arrival_streams.append(stream)
+        return stream
 
     #AGENTS  ---------------------------------
     def add_agents(self, blueprint:list, num_agents:int=1, performance_callback = lambda:1)->AgentPool:  
@@ -435,4 +662,47 @@ class AgentSimulation:
             
         return self.simulate()
 
-    
\ No newline at end of file
+    def replicate_coverage_test(
+        self,
+        agents:int,
+        volumes:dict,
+        intervals:int,
+        service_time:float,
+        replications:int=30,
+        seed:int=None,
+        workers:int=None,
+        confidence:float=0.95,
+        **coverage_args
+    ) -> dict:
+        """
+            Usage: Run 'replications' independent 'coverage_test's of this simulation setup (contact types and agent
+            pool) across a process pool and aggregate their KPIs (see 'get_kpis') with confidence intervals.
+            This instance is not modified.
+            
+            Arguments:
+                -agents, volumes, intervals, **coverage_args: Direct inputs for the 'coverage_test' method.
+                -service_time: Direct input for the 'get_kpis' method.
+                -replications: Number of independent replications.
+                -seed: Optional, root seed. Replication seeds are spawned from it (see 'run_replications').
+                -workers: Optional, number of worker processes. Defaults to the number of cores.
+                -confidence: Confidence level of the intervals.
+        """
+        agent_specs = [(a.blueprint, a.performance_factor, a.max_occ, a.alias, a.id) for a in self.agent_pool.agents]
+        runner = functools.partial(
+            _coverage_test_replication, 
+            self.contact_types, 
+            agent_specs, 
+            dict(coverage_args, agents=agents, volumes=volumes, intervals=intervals), 
+            service_time,
+            event_priorities=self.event_priorities
+        )
+        return run_replications(runner, replications, seed=seed, workers=workers, confidence=confidence)
+
+
+def _coverage_test_replication(contact_types:dict, agent_specs:list, coverage_args:dict, service_time:float, seed, event_priorities:dict=None) -> dict:
+    # Module level so that it can be pickled to worker processes
+    sim = AgentSimulation(contact_types=dict(contact_types), seed=seed, log_level=LOG_OFF, event_priorities=event_priorities)
+    for blueprint, performance_factor, max_occ, alias, id in agent_specs:
+        sim.agent_pool.add_agent(Agent(blueprint, performance_factor=performance_factor, max_occ=max_occ, alias=alias, id=id))
+    sim.coverage_test(**coverage_args)
+    return sim.get_kpis(service_time)
@@ -1,34 +1,91 @@
-import random
+import heapq, itertools
+import numpy as np
 from ..elements.Agent import Agent
 
 class AgentPool:
-    def __init__(self, agents:list = None):
-        self.agents = agents if agents else list()
+    """
+        Usage: Collection of agents. Keeps an availability index (contact type -> occupied lines -> heap of
+        pool positions) that agents update through their 'pool_callback' whenever they occupy or clear a line,
+        or are enabled/disabled. 'find_best_avail_agent' reads the index instead of scanning the pool.
+        Agents added without an id get 'agent-<n>' from the pool's counter, so ids are reproducible.
+    """
+    def __init__(self, agents:list = None, rng:np.random.Generator = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.agents = list()
+        self._positions = dict() # Agent -> position in self.agents
+        self._indexed = dict() # Agent -> (available contact types, occupied lines)
+        self._index = dict() # contact_type -> {occupied_lines: (heap of positions, positions in heap)}
+        self._ids = itertools.count()
+        for agent in (agents if agents else list()):
+            self.add_agent(agent)
 
     def add_agent(self, agent:Agent)->"AgentPool":
+        if agent.id is None:
+            agent.id = f'agent-{next(self._ids)}'
+        self._positions[agent] = len(self.agents)
         self.agents.append(agent)
+        agent.pool_callback = lambda: self
+        self.update_agent(agent)
+        return self
 
     def reset(self):
+        for agent in self.agents:
+            agent.pool_callback = lambda: None
         self.agents = list()
+        self._positions = dict()
+        self._indexed = dict()
+        self._index = dict()
+        self._ids = itertools.count()
+
+    def update_agent(self, agent:Agent)->None:
+        """
+            Usage: Refresh the availability index entry of 'agent'. Called by the agent itself after any change
+            to its lines. Entries it leaves are invalidated and discarded lazily by 'find_best_avail_agent'.
+        """
+        contact_types = agent.get_available_contact_types()
+        occupied = agent.occupied_lines
+        previous = self._indexed.get(agent)
+        self._indexed[agent] = (contact_types, occupied)
+        position = self._positions[agent]
+        for ct in contact_types:
+            if previous and previous[1] == occupied and ct in previous[0]:
+                continue
+            heap, in_heap = self._index.setdefault(ct, dict()).setdefault(occupied, (list(), set()))
+            if position not in in_heap:
+                in_heap.add(position)
+                heapq.heappush(heap, position)
 
     def sample_disabled(self) -> Agent:
-        return random.choice([a for a in self.agents if a.disabled])
-    
+        return self.sample([a for a in self.agents if a.disabled])
+
     def sample_enabled(self) -> Agent:
-        return random.choice([a for a in self.agents if not a.disabled])
+        return self.sample([a for a in self.agents if not a.disabled])
+
+    def sample(self, agents:list) -> Agent:
+        # Random agent of 'agents' (None if empty), drawn from the pool's generator
+        return agents[self.rng.integers(len(agents))] if agents else None
 
     def find_earliest_in(self) -> Agent:
-        return min([a for a in self.agents if not a.disabled], key=lambda a: a.last_in)
-        
+        return min([a for a in self.agents if not a.disabled], key=lambda a: a.last_in, default=None)
+
     def find_agent_by_id(self, id:str) -> Agent:
         next((a for a in self.agents if a.id == id), None)
 
     def find_best_avail_agent(self, contact_type:str) -> Agent:
-        avail_agents = [agent for agent in self.agents if (agent.get_availability().get(contact_type, 0) > 0)]
-        if len(avail_agents) == 0:
+        # Least occupied available agent, ties broken by pool order
+        buckets = self._index.get(contact_type)
+        if not buckets:
             return None
-        else:
-            return min(avail_agents,key=lambda a: a.occupied_lines)
+        for occupied in sorted(buckets):
+            heap, in_heap = buckets[occupied]
+            while heap:
+                agent = self.agents[heap[0]]
+                contact_types, agent_occupied = self._indexed[agent]
+                if agent_occupied == occupied and contact_type in contact_types:
+                    return agent
+                in_heap.discard(heapq.heappop(heap))
+            del buckets[occupied]
+        return None
 
     @property
     def size(self) -> int:
@@ -40,4 +97,4 @@ class AgentPool:
     def __repr__(self):
         return f"AgentPool(size={self.size},active={self.active})"
 
-   
\ No newline at end of file
+
@@ -0,0 +1,112 @@
+from ..elements.Event import Event
+from ..elements.Contact import Contact
+from simulation_tools.arrivals import RateProfile, poisson_arrivals
+import numpy as np
+
+class ArrivalStream:
+    """
+        Usage: Lazy source of the arrival events of one contact type, pulled by the simulation one event at a time.
+        Arrival times are drawn one interval at a time: the interval's volume is placed by a vectorised draw of
+        volume + 1 exponential gaps scaled to the interval length (the arrival times of a Poisson process given its
+        count), so every interval gets exactly its volume. Contacts are only created when their event is pulled, so
+        memory is bounded by a single interval of arrival times.
+
+        With a RateProfile instead of volumes, the interval counts are Poisson draws of the profile's expected
+        arrivals and every interval is filled by time inversion of the profile (see simulation_tools.poisson_arrivals).
+
+        Arguments:
+        -volumes: contacts per interval, or a simulation_tools.RateProfile. Fractional volumes are rounded up or down
+        at random (expected value kept).
+        -interval: interval length.
+        -intervals: Optional, number of intervals generated from a RateProfile. Defaults to the intervals covering
+        the profile's knots (or one period).
+        -contact_type: contact type of the created contacts.
+        -average_patience, auto_solve_time: Contact arguments.
+        -rng: numpy Generator shared with the simulation.
+        -start: start time of the first interval.
+        -first_id: id of the first contact, the following ones are numbered consecutively.
+    """
+    def __init__(
+        self,
+        volumes:list,
+        interval:float,
+        contact_type:str = 'basic',
+        average_patience:float = None,
+        auto_solve_time:float = None,
+        rng:np.random.Generator = None,
+        start:float = 0,
+        intervals:int = None,
+        first_id:int = 0
+    ):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.interval = interval
+        self.contact_type = contact_type
+        self.average_patience = average_patience
+        self.auto_solve_time = auto_solve_time
+        self.start = start
+        self.profile = volumes if isinstance(volumes, RateProfile) else None
+        if self.profile is not None:
+            if intervals is None:
+                intervals = int(np.ceil(((volumes.period or volumes.times[-1]) - start) / interval))
+            counts = self.rng.poisson(np.diff(volumes.cumulative(start + interval * np.arange(intervals + 1))))
+        else:
+            volumes = np.maximum(np.asarray(volumes, dtype=float), 0)
+            counts = np.floor(volumes)
+            if np.any(counts != volumes):
+                counts += self.rng.random(len(volumes)) < volumes - counts
+        self.counts = counts.astype(np.int64)
+        self._remaining = int(self.counts.sum())
+        self._next_id = first_id
+        self._next_interval = 0
+        self._times = list() # arrival times of the current interval
+        self._pos = 0
+
+    def _fill(self) -> None:
+        # Draw the arrival times of the next interval with arrivals
+        counts = self.counts
+        while self._next_interval < len(counts) and counts[self._next_interval] == 0:
+            self._next_interval += 1
+        idx = self._next_interval
+        self._next_interval += 1
+        offset = self.start + self.interval * idx
+        if self.profile is not None:
+            self._times = poisson_arrivals(self.profile, offset, offset + self.interval, self.rng, count=counts[idx]).tolist()
+        else:
+            cumulative = np.cumsum(self.rng.exponential(size=counts[idx] + 1))
+            self._times = (offset + self.interval * cumulative[:-1] / cumulative[-1]).tolist()
+        self._pos = 0
+
+    def get_next_event(self) -> Event:
+        if not self._remaining:
+            print("ArrivalStream | Can't get next element.")
+            return None
+        if self._pos == len(self._times):
+            self._fill()
+        arrival = self._times[self._pos]
+        self._pos += 1
+        self._remaining -= 1
+        contact = Contact(
+            arrival=arrival,
+            contact_type=self.contact_type,
+            average_patience=self.average_patience,
+            auto_solve_time=self.auto_solve_time,
+            rng=self.rng,
+            id=self._next_id
+        )
+        self._next_id += 1
+        return Event(item=contact, event_type='arrival', time=arrival)
+
+    @property
+    def length(self) -> int:
+        return self._remaining
+
+    @property
+    def next_time(self) -> float:
+        if not self._remaining:
+            return float('inf')
+        if self._pos == len(self._times):
+            self._fill()
+        return self._times[self._pos]
+
+    def __repr__(self):
+        return f"ArrivalStream(contact_type={self.contact_type},length={self.length})"
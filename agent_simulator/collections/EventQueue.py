@@ -1,23 +1,47 @@
 from ..elements.Event import Event
+from collections import deque
+import itertools
 
 class EventQueue:
-    def __init__(self, fifo=True):
-        self.events = list()
+    """
+        Usage: Queue of simulation events.
+        -fifo=True: events are served in insertion order (deque).
+        -fifo=False: events are served by time (indexed binary heap). Event times are evaluated once and cached
+        in the heap, so events whose time depends on a callback (e.g. handling events) must be re-keyed
+        with 'update_event' whenever their time changes. The heap tracks the position of every event, so
+        re-keying moves the entry up or down in place in O(log n).
+
+        -priorities: Optional (non FIFO only), event type -> priority. Events at the same time are served by
+        ascending priority, then in insertion order. Types missing from the dictionary get priority 0.
+    """
+    def __init__(self, fifo=True, priorities:dict=None):
         self.fifo = fifo
+        self.priorities = priorities if priorities else dict()
+        self._queue = deque()
+        self._heap = list() # entries [time, key, event], key: priority * _PRIORITY_STRIDE + insertion sequence
+        self._positions = dict() # Event -> index of its entry in _heap
+        self._counter = itertools.count()
+        self._start_counter = itertools.count(-1, -1)
 
     def add_event(self, event:Event)->"EventQueue":
-        self.events.append(event)
+        if self.fifo:
+            self._queue.append(event)
+        else:
+            self._push(event, next(self._counter))
         return self
 
     def add_event_start(self, event:Event)->"EventQueue":
-        self.events.insert(0, event)
+        if self.fifo:
+            self._queue.appendleft(event)
+        else:
+            self._push(event, next(self._start_counter))
         return self
 
     def get_next_event(self) -> Event:
         if self.next:
-            next = self.next
-            self.events.remove(next)
-            return next
+            if self.fifo:
+                return self._queue.popleft()
+            return self._remove(0)
         else:
             print("EventQueue | Can't get next element.")
             return None
@@ -26,32 +50,137 @@ class EventQueue:
         if self.fifo == False:
             print("EventQueue | Conditional Next only available for FIFO queues.")
             return None
-        filtered = list(filter(cond, self.events))
-        if len(filtered) > 0:
-            next = filtered[0]
-            self.events.remove(next)
-            return next
-        else:
-            #print("EventQueue | Can't get next conditional element.")
+        event = next((e for e in self._queue if cond(e)), None)
+        if event is not None:
+            self._queue.remove(event)
+        return event
+
+    def update_event(self, event:Event) -> "EventQueue":
+        """
+            Usage: Re-key 'event' after its time changed (e.g. 'Contact.update_handling' moved 'end_at').
+            The entry is moved up (earlier time) or down (later time) from its current position. The priority and
+            insertion sequence are kept, so ties are still resolved in the same order.
+        """
+        if self.fifo:
+            print("EventQueue | Re-keying only available for non FIFO queues.")
+            return self
+        pos = self._positions.get(event)
+        if pos is None:
+            print("EventQueue | Event not in queue.")
+            return self
+        entry = self._heap[pos]
+        old_time, entry[0] = entry[0], event.time
+        if entry[0] < old_time:
+            self._sift_up(pos)
+        elif entry[0] > old_time:
+            self._sift_down(pos)
+        return self
+
+    def remove_event(self, event:Event) -> Event:
+        """
+            Usage: Remove 'event' from a non FIFO queue wherever it is in the heap.
+        """
+        pos = self._positions.get(event) if not self.fifo else None
+        if pos is None:
+            print("EventQueue | Event not in queue.")
             return None
+        return self._remove(pos)
 
     def sort(self) -> None:
-        self.events = sorted(self.events, key=lambda e: e.time)
+        if self.fifo:
+            self._queue = deque(sorted(self._queue, key=lambda e: e.time))
+        else:
+            # Re-evaluate every cached time and rebuild the heap
+            self._heap = sorted([e.time, seq, e] for _, seq, e in self._heap)
+            self._positions = {entry[2]: pos for pos, entry in enumerate(self._heap)}
         return None
 
+    #INDEXED HEAP
+    def _push(self, event:Event, seq:int) -> None:
+        key = self.priorities.get(event.event_type, 0) * _PRIORITY_STRIDE + seq
+        self._heap.append([event.time, key, event])
+        self._positions[event] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def _remove(self, pos:int) -> Event:
+        heap = self._heap
+        last = heap.pop()
+        if pos == len(heap):
+            event = last[2]
+        else:
+            event = heap[pos][2]
+            heap[pos] = last
+            self._positions[last[2]] = pos
+            self._sift_down(pos)
+            self._sift_up(self._positions[last[2]])
+        del self._positions[event]
+        return event
+
+    def _sift_up(self, pos:int) -> None:
+        heap, positions = self._heap, self._positions
+        entry = heap[pos]
+        time, seq = entry[0], entry[1]
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+            if time < parent[0] or (time == parent[0] and seq < parent[1]):
+                heap[pos] = parent
+                positions[parent[2]] = pos
+                pos = parent_pos
+            else:
+                break
+        heap[pos] = entry
+        positions[entry[2]] = pos
+
+    def _sift_down(self, pos:int) -> None:
+        heap, positions = self._heap, self._positions
+        size = len(heap)
+        entry = heap[pos]
+        time, seq = entry[0], entry[1]
+        child_pos = 2 * pos + 1
+        while child_pos < size:
+            child = heap[child_pos]
+            right_pos = child_pos + 1
+            if right_pos < size:
+                right = heap[right_pos]
+                if right[0] < child[0] or (right[0] == child[0] and right[1] < child[1]):
+                    child_pos, child = right_pos, right
+            if child[0] < time or (child[0] == time and child[1] < seq):
+                heap[pos] = child
+                positions[child[2]] = pos
+                pos = child_pos
+                child_pos = 2 * pos + 1
+            else:
+                break
+        heap[pos] = entry
+        positions[entry[2]] = pos
+
+    @property
+    def events(self) -> list:
+        if self.fifo:
+            return list(self._queue)
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2])]
+
     @property
     def length(self) -> int:
-        return len(self.events)
+        return len(self._queue) if self.fifo else len(self._heap)
     @property
     def next(self) -> Event:
         if self.length > 0:
-            return self.events[0] if self.fifo else min(self.events, key=lambda e:e.time)
+            if self.fifo:
+                return self._queue[0]
+            return self._heap[0][2]
         else:
             return None
+    @property
+    def next_time(self) -> float:
+        event = self.next
+        if event is None:
+            return float('inf')
+        return event.time if self.fifo else self._heap[0][0]
 
     def __repr__(self):
         return f"EventQueue(length={self.length},fifo={self.fifo})"
 
-
-        
-        
\ No newline at end of file
+# Spacing of the priorities in the heap keys: (priority, sequence) is compared as a single integer
+_PRIORITY_STRIDE = 1 << 48
@@ -0,0 +1,73 @@
+from ..elements.Event import Event
+from collections import deque
+import itertools
+
+class WaitingQueue:
+    """
+        Usage: FIFO queue of waiting contacts, partitioned by contact type. Every contact type keeps its own
+        deque of (sequence, event) pairs, so the oldest waiting contact among k contact types is found by
+        comparing k queue heads instead of scanning the whole backlog.
+    """
+    def __init__(self):
+        self._queues = dict() # contact_type -> deque of (seq, Event)
+        self._counter = itertools.count()
+        self._length = 0
+
+    def add_event(self, event:Event)->"WaitingQueue":
+        ct = event.item.contact_type
+        queue = self._queues.get(ct)
+        if queue is None:
+            queue = self._queues[ct] = deque()
+        queue.append((next(self._counter), event))
+        self._length += 1
+        return self
+
+    def get_next_event(self) -> Event:
+        event = self.get_cond_next_event(self._queues.keys())
+        if event is None:
+            print("WaitingQueue | Can't get next element.")
+        return event
+
+    def get_cond_next_event(self, contact_types:list, present:float=None, on_expired=None) -> Event:
+        """
+            Usage: Pop the oldest waiting event whose contact type is in 'contact_types'.
+            Arguments:
+            -contact_types: contact types that can be served.
+            -present: Optional, current time. If provided, contacts found at the head of the queues whose
+            patience or auto-solve time expired by 'present' are discarded instead of returned.
+            -on_expired: Optional, callback receiving every discarded event and 'present'.
+        """
+        while(1):
+            queue = self._oldest_queue(contact_types)
+            if queue is None:
+                return None
+            event = queue.popleft()[1]
+            self._length -= 1
+            if present is not None and event.item.check_missed(present):
+                if on_expired:
+                    on_expired(event, present)
+                continue
+            return event
+
+    def _oldest_queue(self, contact_types:list) -> deque:
+        oldest = None
+        for ct in contact_types:
+            queue = self._queues.get(ct)
+            if queue and (oldest is None or queue[0][0] < oldest[0][0]):
+                oldest = queue
+        return oldest
+
+    @property
+    def events(self) -> list:
+        return [e for _, e in sorted((pair for q in self._queues.values() for pair in q), key=lambda pair: pair[0])]
+
+    @property
+    def length(self) -> int:
+        return self._length
+    @property
+    def next(self) -> Event:
+        queue = self._oldest_queue(self._queues.keys())
+        return queue[0][1] if queue else None
+
+    def __repr__(self):
+        return f"WaitingQueue(length={self.length},contact_types={len(self._queues)})"
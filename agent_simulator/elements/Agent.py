@@ -1,8 +1,6 @@
-import uuid
-import random
 from .Line import Line
 from .Contact import Contact
-from typing import List
+from typing import List, Callable
 from collections import Counter
 
 class Agent:
@@ -11,9 +9,11 @@ class Agent:
         blueprint:List[dict] = {'num_lines': 1, 'contact_types': ['basic'], 'priority':1, 'max_occ':None},
         performance_factor:float = 1.0,
         max_occ:int = None,
-        alias:str = None
+        alias:str = None,
+        pool_callback:Callable = lambda:None,
+        id:str = None
     ) -> None:
-        self.id = str(uuid.uuid4())
+        self.id = id # Assigned by the AgentPool the agent is added to, if not given
         self.alias = alias
         self.blueprint = blueprint
         self.performance_factor = performance_factor
@@ -22,6 +22,10 @@ class Agent:
         self.max_occ = max_occ if max_occ else len(self.lines)
         self.disabled = True
         self.last_in = 0
+        self.logged_time = 0
+        self.busy_time = 0
+        self.busy_since = None
+        self.pool_callback = pool_callback
 
     def _create_lines(self, blueprint: List[dict]) -> List[Line]:
         lines = []
@@ -33,7 +37,9 @@ class Agent:
             lines.extend([Line( contact_types,lambda: self , priority, max_occ) for _ in range(num_lines)])
         return lines
 
-    def occupy_line(self, contact:Contact, specific_line:Line = None)->Line:
+    def occupy_line(self, contact:Contact, specific_line:Line = None, time:float = None)->Line:
+        if self.occupied_lines == 0 and time is not None and not self.disabled:
+            self.busy_since = time
         self.occupied_lines += 1
         selected_line = specific_line
         if(specific_line == None):
@@ -41,19 +47,31 @@ class Agent:
             avail_lines = [line for line in self.lines if (line.is_occupied == False) & (ct in line.contact_types)]
             selected_line = min(avail_lines, key = lambda l: l.priority) 
         selected_line.occupy(contact)
+        self._update_pool()
         return selected_line
     
-    def clear_line(self, line)->Line:
+    def clear_line(self, line, time:float = None)->Line:
         self.occupied_lines -= 1
+        if self.occupied_lines == 0 and time is not None and self.busy_since is not None:
+            self.busy_time += time - self.busy_since
+            self.busy_since = None
         line.solve()
+        self._update_pool()
         return line
 
-    def disable_lines(self)->"Agent":
+    def disable_lines(self, time:float=None)->"Agent":
         if self.disabled: 
             print('Agent | Agent already disabled.')
         else:
             [line.disable() for line in self.lines]
             self.disabled = True
+            if time is not None:
+                self.logged_time += time - self.last_in
+                #Busy time only counts while logged in (contacts may still be finishing after logout)
+                if self.busy_since is not None:
+                    self.busy_time += time - self.busy_since
+                    self.busy_since = None
+            self._update_pool()
         return self
             
     def enable_lines(self, time:float=0)->"Agent":
@@ -61,10 +79,19 @@ class Agent:
             [line.enable() for line in self.lines]
             self.disabled = False
             self.last_in = time
+            if self.occupied_lines > 0:
+                self.busy_since = time
+            self._update_pool()
         else:
             print('Agent | Agent not disabled.')
         return self
 
+    def reset_time_counters(self)->"Agent":
+        self.logged_time = 0
+        self.busy_time = 0
+        self.busy_since = None
+        return self
+
     def get_availability(self):
         if self.disabled | (self.occupied_lines==self.max_occ):
             return {}
@@ -82,6 +109,27 @@ class Agent:
             ]
             return dict(Counter(open_contact_types))
 
+    def get_available_contact_types(self)->set:
+        if self.disabled | (self.occupied_lines==self.max_occ):
+            return set()
+        return {
+            contact_type
+            for line
+            in self.lines
+            if (line.open
+                & (line.is_occupied == False)
+                & (self.occupied_lines < (line.max_occ if line.max_occ else float('inf')))
+               )
+            for contact_type
+            in line.contact_types
+        }
+
+    def _update_pool(self)->None:
+        # Keeps the owning AgentPool's availability index in sync
+        pool = self.pool_callback()
+        if pool:
+            pool.update_agent(self)
+
     def get_occupied_lines(self):
         return [line for line in self.lines if line.is_occupied]
             
@@ -1,27 +1,38 @@
 import math
-import uuid
-import random
+import itertools
 import numpy as np
 
+# Used by contacts created without an injected generator
+_default_rng = np.random.default_rng()
+
 class Contact:
+    __slots__ = (
+        'rng', 'id', 'arrival', 'concurrency_at_arrival', '_concurrency_history', 'contact_type', 'ht_distro', 
+        'status', 'waiting_time', 'handling_time', 'patience', 'auto_solve_time'
+    )
+    _ids = itertools.count()
+
     def __init__(
         self,
         arrival:int = 0,
         contact_type:str='basic',
         ht_distro:str='gamma-2',
         average_patience:float=None,
-        auto_solve_time:float=None
+        auto_solve_time:float=None,
+        rng:np.random.Generator=None,
+        id:int=None
     ):
-        self.id = str(uuid.uuid4())
+        self.rng = rng if rng is not None else _default_rng
+        self.id = id if id is not None else next(Contact._ids) # Simulations pass their own ids
         self.arrival = arrival
         self.concurrency_at_arrival = None
-        self.concurrency_history = list()
+        self._concurrency_history = list() # of (concurrency, time) tuples
         self.contact_type = contact_type
         self.ht_distro = ht_distro
         self.status = "created"
         self.waiting_time = 0
         self.handling_time = None
-        self.patience = round(np.random.exponential(scale=average_patience)) if average_patience else math.inf
+        self.patience = round(self.rng.exponential(scale=average_patience)) if average_patience else math.inf
         self.auto_solve_time = auto_solve_time if auto_solve_time else math.inf
     
     def materialise_handling(self, handling_start:float, aht:float, concurrency:int=1.0)->"Contact":
@@ -36,11 +47,11 @@ class Contact:
         else:
             self.status = 'handled'
             if self.ht_distro == 'gamma-2':
-                self.handling_time = max(min(np.random.gamma(2, aht/2), aht * 15), 0.1)
+                self.handling_time = max(min(self.rng.gamma(2, aht/2), aht * 15), 0.1)
             if self.ht_distro == 'exponential':
-                self.handling_time = max(min(np.random.exponential(aht), aht * 15), 0.1)
+                self.handling_time = max(min(self.rng.exponential(aht), aht * 15), 0.1)
             self.concurrency_at_arrival = concurrency
-            self.concurrency_history.append({"concurrency": concurrency, "time": handling_start})
+            self._concurrency_history.append((concurrency, handling_start))
             self.waiting_time = waiting_time
         return self
     
@@ -52,12 +63,13 @@ class Contact:
         else:
             remaining_time = handling_end - present
             new_remaining_time = remaining_time * factor 
-            self.concurrency_history.append({"concurrency": new_concurrency, "time": present})
+            self._concurrency_history.append((new_concurrency, present))
             self.handling_time += (new_remaining_time - remaining_time)
         return self
 
-    def get_current_concurrency(self)->"Contact":
-        return self.concurrency_history[-1]
+    def get_current_concurrency(self)->dict:
+        concurrency, time = self._concurrency_history[-1]
+        return {"concurrency": concurrency, "time": time}
 
     def check_missed(self, present) -> bool:
         waiting_time =  present - self.arrival
@@ -66,6 +78,10 @@ class Contact:
         
     
     #PROPERTIES   
+    @property
+    def concurrency_history(self) -> list:
+        return [{"concurrency": concurrency, "time": time} for concurrency, time in self._concurrency_history]
+
     @property
     def arrival_at(self) -> int:
         return self.arrival
@@ -1,23 +1,255 @@
-import time
+import os, json, time, shutil, tempfile
+import numpy as np
+
+#LOG LEVELS
+LOG_OFF = 0 # Nothing is logged
+LOG_KPI = 1 # Only the actions needed to rebuild KPIs (arrivals, solved contacts, agent IO)
+LOG_FULL = 2 # Every action
+
+# Interned action and item type codes (position in the tuple)
+ACTIONS = (
+    'simulation_started', 'simulation_ended', 'arrival', 'contact_waiting', 'materialised_handling', 'updated_handling',
+    'contact_handled', 'contact_missed', 'agent_line_occupied', 'agent_line_freed', 'agent_in', 'agent_out', 'check_waiting_queue'
+)
+KPI_ACTIONS = ('simulation_started', 'simulation_ended', 'arrival', 'contact_handled', 'contact_missed', 'agent_in', 'agent_out')
+ITEM_TYPES = ('simulation', 'contact', 'agent')
+
+LOG_DTYPE = np.dtype([('time', np.float64), ('action', np.uint8), ('item_type', np.uint8), ('item_id', np.int64)])
 
 class Log:
-    def __init__(self, sim_config:dict):
+    """
+        Usage: Append-only columnar simulation log.
+        Actions and item types are stored as interned codes (see ACTIONS and ITEM_TYPES). Contact ids are stored as
+        they are, other item ids (agents, simulation) are interned in 'item_ids'. Actions are buffered in plain lists
+        and flushed every 'chunk_size' actions into NumPy chunks of LOG_DTYPE, kept in memory or, if 'spill_dir' is
+        set, written to disk as .npy files under 'spill_dir/sim-<timestamp>' so that full traces do not stay in RAM.
+
+        Arguments:
+        -sim_config: simulation configuration, kept for reference.
+        -level: LOG_OFF, LOG_KPI or LOG_FULL.
+        -chunk_size: actions per chunk.
+        -spill_dir: Optional, directory where chunks are spilled to.
+    """
+    def __init__(self, sim_config:dict, level:int=LOG_FULL, chunk_size:int=65536, spill_dir:str=None):
         self.sim_config = sim_config
         self.simulation_timestamp = time.time()
-        self.log = list()
-    
-    def log_action(self, time:float, action:str, item_type:str, item_id:str):
-        self.log.append({
-            'time': time,
-            'action': action,
-            'item_type': item_type,
-            'item_id': item_id
-        })
+        self.level = level
+        self.chunk_size = chunk_size
+        self.item_ids = list() # Interned non contact ids
+        self._item_codes = dict()
+        self._action_codes = {action: code for code, action in enumerate(ACTIONS)}
+        self._enabled = set(ACTIONS if level >= LOG_FULL else KPI_ACTIONS if level >= LOG_KPI else ())
+        self._contact_type = ITEM_TYPES.index('contact')
+        self._item_type_codes = {item_type: code for code, item_type in enumerate(ITEM_TYPES)}
+        self._buffer = ([], [], [], [])
+        self._chunks = list() # In memory chunks (or spilled chunk paths)
+        self._length = 0
+        self.path = None
+        if spill_dir:
+            self.path = os.path.join(spill_dir, f'sim-{self.simulation_timestamp:.6f}')
+            os.makedirs(self.path, exist_ok=True)
+
+    def log_action(self, time:float, action:str, item_type:str, item_id):
+        if action not in self._enabled:
+            return self
+        item_type_code = self._item_type_codes[item_type]
+        if item_type_code != self._contact_type:
+            code = self._item_codes.get(item_id)
+            if code is None:
+                code = self._item_codes[item_id] = len(self.item_ids)
+                self.item_ids.append(item_id)
+            item_id = code
+        times, actions, item_types, item_ids = self._buffer
+        times.append(time)
+        actions.append(self._action_codes[action])
+        item_types.append(item_type_code)
+        item_ids.append(item_id)
+        self._length += 1
+        if len(times) >= self.chunk_size:
+            self.flush()
         return self
 
+    def flush(self) -> "Log":
+        """
+            Usage: Move buffered actions into a chunk (written to disk if spilling). Called automatically every
+            'chunk_size' actions and at the end of a simulation.
+        """
+        times, actions, item_types, item_ids = self._buffer
+        if len(times) == 0:
+            return self
+        chunk = np.empty(len(times), dtype=LOG_DTYPE)
+        chunk['time'] = times
+        chunk['action'] = actions
+        chunk['item_type'] = item_types
+        chunk['item_id'] = item_ids
+        if self.path:
+            chunk_path = os.path.join(self.path, f'chunk_{len(self._chunks):06d}.npy')
+            np.save(chunk_path, chunk)
+            self._chunks.append(chunk_path)
+            self._write_meta(self.path)
+        else:
+            self._chunks.append(chunk)
+        self._buffer = ([], [], [], [])
+        return self
+
+    def _write_meta(self, path:str) -> None:
+        meta = {
+            'simulation_timestamp': self.simulation_timestamp,
+            'level': self.level,
+            'actions': ACTIONS,
+            'item_types': ITEM_TYPES,
+            'item_ids': self.item_ids,
+            'chunks': [os.path.basename(c) for c in self._chunks if isinstance(c, str)],
+            'length': self._length - len(self._buffer[0])
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, default=str)
+
+    def persist(self, path:str=None):
+        """
+            Usage: Consolidate the log into a memory-mappable directory and return a LogReader on it.
+            Chunks are copied one at a time into 'log.npy', so the log is never fully loaded, then the item and
+            time indexes are built from the memory-mapped rows by an external merge sort (see '_sorted_index'), which
+            keeps a few 'chunk_size' blocks in memory. When a spilled log is persisted into its own spill
+            directory, its chunk files are replaced by 'log.npy'.
+
+            Arguments:
+            -path: Optional, target directory. Defaults to the spill directory.
+        """
+        from agent_simulator.elements.LogReader import LogReader
+        path = path if path else self.path
+        if not path:
+            print("ValErr: 'path' is required to persist a log that is not spilled to disk")
+            return None
+        self.flush()
+        os.makedirs(path, exist_ok=True)
+        log_path = os.path.join(path, 'log.npy')
+        rows = np.lib.format.open_memmap(log_path + '.tmp', mode='w+', dtype=LOG_DTYPE, shape=(self._length,))
+        fill = 0
+        for c in self._chunks:
+            chunk = np.load(c, mmap_mode='r') if isinstance(c, str) else c
+            rows[fill:fill + len(chunk)] = chunk
+            fill += len(chunk)
+        rows.flush()
+        del rows
+        os.replace(log_path + '.tmp', log_path)
+        if path == self.path:
+            for c in self._chunks:
+                if isinstance(c, str) and c != log_path:
+                    os.remove(c)
+            self._chunks = [log_path]
+
+        #INDEXES
+        rows = np.load(log_path, mmap_mode='r')
+        tmp_dir = tempfile.mkdtemp(dir=path, suffix='.sort')
+        try:
+            _sorted_index(
+                rows, lambda block: item_key(block['item_type'], block['item_id']),
+                os.path.join(path, 'item_keys.npy'), os.path.join(path, 'item_order.npy'), self.chunk_size, tmp_dir
+            )
+            _sorted_index(
+                rows, lambda block: np.asarray(block['time']),
+                os.path.join(path, 'times.npy'), os.path.join(path, 'time_order.npy'), self.chunk_size, tmp_dir
+            )
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        del rows
+        self._write_meta(path)
+        return LogReader(path)
+
+    def to_array(self) -> np.ndarray:
+        """
+            Usage: The whole log as a structured array of LOG_DTYPE (codes, see 'decode'). Spilled chunks are read back.
+        """
+        self.flush()
+        chunks = [np.load(c) if isinstance(c, str) else c for c in self._chunks]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=LOG_DTYPE)
+
+    def decode(self, rows:np.ndarray) -> list:
+        """
+            Usage: Convert rows of LOG_DTYPE into the {'time', 'action', 'item_type', 'item_id'} dictionaries.
+        """
+        return [
+            {
+                'time': t,
+                'action': ACTIONS[a],
+                'item_type': ITEM_TYPES[it],
+                'item_id': i if it == self._contact_type else self.item_ids[i]
+            }
+            for t, a, it, i
+            in rows.tolist()
+        ]
+
+    @property
+    def log(self) -> list:
+        return self.decode(self.to_array())
+
     @property
     def length(self) -> int:
-        return len(self.log)
+        return self._length
 
     def __repr__(self):
-        return f"Log(length={self.length})"
\ No newline at end of file
+        return f"Log(length={self.length})"
+
+def item_key(item_type, item_id):
+    # One sortable int64 key per (item_type, item_id), item ids must be below 2**56
+    return (np.asarray(item_type).astype(np.int64) << 56) | np.asarray(item_id, dtype=np.int64)
+
+def _sorted_index(rows:np.ndarray, values_of, values_path:str, order_path:str, block:int, tmp_dir:str) -> None:
+    # Stable argsort of 'values_of(rows)' written as .npy files (sorted values, row positions). Blocks of 'block' rows
+    # are sorted in memory into runs on disk, then runs are merged pairwise, 'block' rows of each run at a time
+    runs = list()
+    for start in range(0, len(rows), block):
+        values = values_of(rows[start:start + block])
+        order = np.argsort(values, kind='stable')
+        runs.append(_save_run(tmp_dir, values[order], order + start))
+    if not runs:
+        runs.append(_save_run(tmp_dir, values_of(rows[:0]), np.empty(0, dtype=np.int64)))
+    while len(runs) > 1:
+        merged = [_merge_runs(tmp_dir, runs[i], runs[i + 1], block) for i in range(0, len(runs) - 1, 2)]
+        runs = merged + runs[len(runs) - len(runs) % 2:]
+    os.replace(runs[0][0], values_path)
+    os.replace(runs[0][1], order_path)
+
+def _save_run(tmp_dir:str, values:np.ndarray, positions:np.ndarray) -> tuple:
+    fd, values_path = tempfile.mkstemp(dir=tmp_dir, suffix='.npy')
+    os.close(fd)
+    np.save(values_path, values)
+    fd, order_path = tempfile.mkstemp(dir=tmp_dir, suffix='.npy')
+    os.close(fd)
+    np.save(order_path, positions.astype(np.int64))
+    return values_path, order_path
+
+def _merge_runs(tmp_dir:str, a:tuple, b:tuple, block:int) -> tuple:
+    # Merge two sorted runs by (value, position). Every step takes the rows of both blocks up to the smaller of
+    # the blocks' last rows: the rows left in either run all come after it, and one block is used up every step
+    (a_values, a_order), (b_values, b_order) = [(np.load(v, mmap_mode='r'), np.load(o, mmap_mode='r')) for v, o in (a, b)]
+    fd, values_path = tempfile.mkstemp(dir=tmp_dir, suffix='.npy')
+    os.close(fd)
+    fd, order_path = tempfile.mkstemp(dir=tmp_dir, suffix='.npy')
+    os.close(fd)
+    length = len(a_values) + len(b_values)
+    values = np.lib.format.open_memmap(values_path, mode='w+', dtype=a_values.dtype, shape=(length,))
+    order = np.lib.format.open_memmap(order_path, mode='w+', dtype=np.int64, shape=(length,))
+    i = j = fill = 0
+    while fill < length:
+        va, pa = a_values[i:i + block], a_order[i:i + block]
+        vb, pb = b_values[j:j + block], b_order[j:j + block]
+        if len(va) and len(vb):
+            cut_value, cut_position = min((va[-1], pa[-1]), (vb[-1], pb[-1]))
+            take_a = np.count_nonzero((va < cut_value) | ((va == cut_value) & (pa <= cut_position)))
+            take_b = np.count_nonzero((vb < cut_value) | ((vb == cut_value) & (pb <= cut_position)))
+        else:
+            take_a, take_b = len(va), len(vb)
+        v = np.concatenate([va[:take_a], vb[:take_b]])
+        p = np.concatenate([pa[:take_a], pb[:take_b]])
+        merged = np.lexsort((p, v))
+        values[fill:fill + len(v)] = v[merged]
+        order[fill:fill + len(v)] = p[merged]
+        i, j, fill = i + take_a, j + take_b, fill + len(v)
+    values.flush()
+    order.flush()
+    del values, order, a_values, a_order, b_values, b_order
+    for path in (*a, *b):
+        os.remove(path)
+    return values_path, order_path
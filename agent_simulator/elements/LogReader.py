@@ -0,0 +1,88 @@
+import os, json
+import numpy as np
+
+from agent_simulator.elements.Log import item_key
+
+class LogReader:
+    """
+        Usage: Read-only access to a log persisted with Log.persist. The log and its indexes are memory-mapped, so
+        queries only touch the pages they need and traces larger than RAM can be queried.
+
+        Files in 'path':
+        -log.npy: rows of LOG_DTYPE in logging order.
+        -item_keys.npy / item_order.npy: sorted (item_type, item_id) keys and the row positions they come from.
+        -times.npy / time_order.npy: sorted times and the row positions they come from.
+        -meta.json: code tables (actions, item types, interned item ids).
+
+        Arguments:
+        -path: directory written by Log.persist.
+    """
+    def __init__(self, path:str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.actions = tuple(self.meta['actions'])
+        self.item_types = tuple(self.meta['item_types'])
+        self.item_ids = self.meta['item_ids']
+        self._item_codes = {item_id: code for code, item_id in enumerate(self.item_ids)}
+        self._contact_type = self.item_types.index('contact')
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        self.rows = load('log.npy')
+        self._item_keys = load('item_keys.npy')
+        self._item_order = load('item_order.npy')
+        self._times = load('times.npy')
+        self._time_order = load('time_order.npy')
+
+    #QUERIES
+    def timeline(self, item_id, item_type:str='contact', decode:bool=True):
+        """
+            Usage: Every action logged for one item, in logging order.
+
+            Arguments:
+            -item_id: contact id, agent id or simulation id.
+            -item_type: 'contact', 'agent' or 'simulation'.
+            -decode: if True returns dictionaries (see 'decode'), otherwise the LOG_DTYPE rows.
+        """
+        type_code = self.item_types.index(item_type)
+        if type_code != self._contact_type:
+            item_id = self._item_codes.get(item_id)
+            if item_id is None:
+                return list() if decode else self.rows[:0]
+        key = item_key(type_code, item_id)
+        start, end = np.searchsorted(self._item_keys, [key, key + 1])
+        rows = self.rows[np.sort(self._item_order[start:end])]
+        return self.decode(rows) if decode else rows
+
+    def between(self, start:float, end:float, actions:list=None, decode:bool=True):
+        """
+            Usage: Actions logged with start <= time < end, in time order (ties in logging order).
+
+            Arguments:
+            -start, end: time range.
+            -actions: Optional, list of action names to keep (e.g. ['agent_in', 'agent_out']).
+            -decode: if True returns dictionaries (see 'decode'), otherwise the LOG_DTYPE rows.
+        """
+        first, last = np.searchsorted(self._times, [start, end])
+        rows = self.rows[self._time_order[first:last]]
+        if actions is not None:
+            codes = [self.actions.index(action) for action in actions]
+            rows = rows[np.isin(rows['action'], codes)]
+        return self.decode(rows) if decode else rows
+
+    def decode(self, rows:np.ndarray) -> list:
+        return [
+            {
+                'time': t,
+                'action': self.actions[a],
+                'item_type': self.item_types[it],
+                'item_id': i if it == self._contact_type else self.item_ids[i]
+            }
+            for t, a, it, i
+            in rows.tolist()
+        ]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"LogReader(path={self.path},length={len(self)})"
@@ -0,0 +1,76 @@
+"""
+    Usage: Before/after benchmark for the concurrency simulator event calendar.
+    Run from the repository root with: python -m benchmarks.event_calendar
+
+    'before' replays the previous list based loop (full re-sort + pop(0) on every event),
+    'after' is the current heap based Simulation.simulate. Both runs use the same seed, and
+    the outputs are compared to make sure the results are identical.
+"""
+import time
+
+from concurrency_simulator import Simulation
+from concurrency_simulator.event import Event
+
+class ListSimulation(Simulation):
+    def simulate(self, volumes:dict, lines:int):
+        while lines > self.current and len(self.waiting):
+            self._handle_next_waiting(self.chain_position * self.interval ,lines)
+
+        new_events = [
+            Event(item=batch[idx], event_type='arrival', time=time)
+            for batch in self._generate_contact_batches(volumes)
+            for idx, time in enumerate(batch.arrivals.tolist())
+        ]
+        events = [*self.events, *new_events]
+        self.events = ListCalendar(events)
+        while len(events) > 0:
+            events = sorted(events, key = lambda event: event.time)
+            self.events.events = events
+            next_event:Event = events.pop(0)
+            if next_event.time >= (1 + self.chain_position) * self.interval:
+                events.append(next_event)
+                break
+            elif(next_event.istype('arrival')):
+                self._handle_arriving_contact(next_event.item, handling_start=next_event.time, lines=lines)
+            else:
+                self.current -= 1
+                while len(self.waiting) > 0 and lines > self.current:
+                    self._handle_next_waiting(next_event.time,lines)
+
+        self.chain_position += 1
+        self.lines_acc.append(lines)
+
+class ListCalendar:
+    def __init__(self, events:list):
+        self.events = events
+
+    def push(self, event:Event):
+        self.events.append(event)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+def run(simulation_class, volume:int, intervals:int, seed:int) -> tuple:
+    sim = simulation_class(interval=900, max_concurrency=3, seed=seed)
+    sim.add_contact_type('chat', (300, 100), average_patience=120, auto_solve_time=600)
+    # Lines sized for ~90% utilisation so that a small backlog builds up
+    lines = max(1, round(volume * 500 / 900 / 0.9))
+    start = time.perf_counter()
+    sim.coverage_test({'chat': volume}, lines, intervals)
+    elapsed = time.perf_counter() - start
+    outcome = [(c.arrival, c.status, c.waiting_time, c.handling_time) for c in [*sim.handled, *sim.missed]]
+    return elapsed, outcome
+
+def main(volumes:tuple=(100, 1000, 10000), intervals:int=2, seed:int=0):
+    print(f"{'contacts/interval':>18} {'before (s)':>12} {'after (s)':>12} {'speedup':>9}  identical")
+    for volume in volumes:
+        before, before_outcome = run(ListSimulation, volume, intervals, seed)
+        after, after_outcome = run(Simulation, volume, intervals, seed)
+        identical = before_outcome == after_outcome
+        print(f"{volume:>18} {before:>12.3f} {after:>12.3f} {before / after:>8.1f}x  {identical}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+    Usage: Benchmark suite for both simulation engines, with fixed seeds so that runs are comparable across commits.
+    Run from the repository root with:
+        python -m benchmarks.suite [--output results.json] [--compare previous.json] [--scale 0.5] [--only name]
+
+    Every scenario runs in a fresh worker process and reports wall time, simulated events, events per second and
+    peak memory (growth of the worker's maximum resident set size during the scenario, in MB).
+
+    Events are the scheduler events actually processed:
+    -concurrency_simulator: arrivals + solves (contacts still in the calendar are not counted).
+    -agent_simulator: arrivals + handling ends + agent in/out, counted from a LOG_KPI simulation log.
+"""
+import argparse, json, os, platform, resource, subprocess, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from concurrency_simulator import Simulation
+from agent_simulator import AgentSimulation
+from agent_simulator.elements.Log import LOG_KPI, ACTIONS
+
+SEED = 2024
+
+#CONCURRENCY SIMULATOR SCENARIOS
+def _simulation(contact_types:dict) -> Simulation:
+    sim = Simulation(interval=1800, max_concurrency=3, seed=SEED)
+    for name, (aht, patience) in contact_types.items():
+        sim.add_contact_type(name, aht, average_patience=patience)
+    return sim
+
+def _simulation_events(sim:Simulation) -> int:
+    pending_solves = sum(1 for event in sim.events if event.event_type == 'solve')
+    handled = len(sim.handled)
+    return handled + len(sim.missed) + len(sim.waiting) + handled - pending_solves
+
+def concurrency_small(scale:float) -> int:
+    # Single skill, small queue at ~90% utilisation
+    sim = _simulation({'chat': ((300, 60), 120)})
+    sim.coverage_test({'chat': round(150 * scale)}, lines=40, intervals=20)
+    return _simulation_events(sim)
+
+def concurrency_multi(scale:float) -> int:
+    # Many contact types sharing a large pool of lines
+    sim = _simulation({ct: ((200 + 50 * i, 40), 90 + 30 * i) for i, ct in enumerate('abcdef')})
+    sim.coverage_test({ct: round(500 * scale) for ct in 'abcdef'}, lines=round(1100 * scale), intervals=10)
+    return _simulation_events(sim)
+
+def concurrency_overloaded(scale:float) -> int:
+    # Half the lines needed, without patience: the backlog keeps growing
+    sim = _simulation({'chat': ((300, 60), None)})
+    sim.coverage_test({'chat': round(400 * scale)}, lines=50, intervals=20)
+    return _simulation_events(sim)
+
+def concurrency_long(scale:float) -> int:
+    # 30 days of half-hour intervals
+    sim = _simulation({'chat': ((300, 60), 120), 'mail': ((200, 0), None)})
+    sim.coverage_test({'chat': round(60 * scale), 'mail': round(20 * scale)}, lines=25, intervals=30 * 48)
+    return _simulation_events(sim)
+
+#AGENT SIMULATOR SCENARIOS
+def _agent_simulation(contact_types:dict) -> AgentSimulation:
+    sim = AgentSimulation(seed=SEED, log_level=LOG_KPI)
+    for name, (base, increment, patience) in contact_types.items():
+        sim.add_contact_type(name, base, increment, average_patience=patience, auto_solve_time=30)
+    return sim
+
+def _agent_events(log) -> int:
+    counted = [ACTIONS.index(action) for action in ('arrival', 'contact_handled', 'agent_in', 'agent_out')]
+    return int(np.isin(log.to_array()['action'], counted).sum())
+
+def agent_small(scale:float) -> int:
+    sim = _agent_simulation({'chat': (5, 2, 6)})
+    sim.add_agents([{'num_lines': 2, 'contact_types': ['chat'], 'priority': 1}], num_agents=12)
+    return _agent_events(sim.coverage_test(agents=12, volumes={'chat': round(150 * scale)}, intervals=20))
+
+def agent_multi(scale:float) -> int:
+    # Multi-skill blueprint with 500 agents
+    sim = _agent_simulation({ct: (5, 2, 3) for ct in 'abcdef'})
+    sim.add_agents([
+        {'num_lines': 2, 'contact_types': list('abc'), 'priority': 1},
+        {'num_lines': 1, 'contact_types': list('def'), 'priority': 2}
+    ], num_agents=500)
+    return _agent_events(sim.coverage_test(agents=500, volumes={ct: round(1500 * scale) for ct in 'abcdef'}, intervals=4))
+
+def agent_overloaded(scale:float) -> int:
+    sim = _agent_simulation({'chat': (5, 2, 20), 'mail': (4, 1, None)})
+    sim.add_agents([{'num_lines': 2, 'contact_types': ['chat', 'mail'], 'priority': 1}], num_agents=10)
+    return _agent_events(sim.coverage_test(agents=10, volumes={'chat': round(300 * scale), 'mail': round(100 * scale)}, intervals=20))
+
+def agent_long(scale:float) -> int:
+    # 30 days of hourly intervals
+    sim = _agent_simulation({'chat': (5, 2, 6)})
+    sim.add_agents([{'num_lines': 2, 'contact_types': ['chat'], 'priority': 1}], num_agents=8)
+    return _agent_events(sim.coverage_test(agents=8, volumes={'chat': round(80 * scale)}, intervals=30 * 24))
+
+SCENARIOS = {
+    'concurrency_small': concurrency_small,
+    'concurrency_multi': concurrency_multi,
+    'concurrency_overloaded': concurrency_overloaded,
+    'concurrency_long': concurrency_long,
+    'agent_small': agent_small,
+    'agent_multi': agent_multi,
+    'agent_overloaded': agent_overloaded,
+    'agent_long': agent_long
+}
+
+#RUNNER
+def _measure(name:str, scale:float) -> dict:
+    # Runs in a fresh worker process, so memory is not shared with other scenarios
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    events = SCENARIOS[name](scale)
+    wall_time = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'scenario': name,
+        'engine': name.split('_')[0],
+        'wall_time': wall_time,
+        'events': events,
+        'events_per_second': events / wall_time if wall_time else float('nan'),
+        'peak_memory_mb': (rss_after - rss_before) / 1024 # ru_maxrss is in KB on Linux
+    }
+
+def run(scenarios:list=None, scale:float=1.0) -> dict:
+    results = list()
+    for name in (scenarios or SCENARIOS):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(_measure, name, scale).result())
+    return {'meta': _meta(scale), 'results': results}
+
+def _meta(scale:float) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': SEED,
+        'scale': scale
+    }
+
+def report(results:dict, previous:dict=None) -> None:
+    before = {r['scenario']: r for r in previous['results']} if previous else dict()
+    print(f"{'scenario':<24} {'wall (s)':>10} {'events':>10} {'events/s':>12} {'peak MB':>9}" + ('  speedup' if previous else ''))
+    for r in results['results']:
+        line = f"{r['scenario']:<24} {r['wall_time']:>10.3f} {r['events']:>10} {r['events_per_second']:>12.0f} {r['peak_memory_mb']:>9.1f}"
+        if r['scenario'] in before:
+            line += f"  {before[r['scenario']]['wall_time'] / r['wall_time']:>6.2f}x"
+        print(line)
+
+def main(argv:list=None) -> dict:
+    parser = argparse.ArgumentParser(description='Benchmark both simulation engines.')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare wall times with')
+    parser.add_argument('--scale', type=float, default=1.0, help='volume scale factor of every scenario')
+    parser.add_argument('--only', nargs='*', choices=list(SCENARIOS), help='run only these scenarios')
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.scale)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    report(results, previous)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,9 +1,17 @@
 import math
-import uuid
-import random
+import itertools
 import numpy as np
 
+# Used by contacts created without an injected generator
+_default_rng = np.random.default_rng()
+
 class Contact:
+    __slots__ = (
+        'rng', 'id', 'arrival', 'contact_type', 'aht', 'status', 'waiting_time', 'concurrency', 'handling_time', 
+        'available_lines', 'occupied_lines', 'patience', 'auto_solve_time', 'handling_draw'
+    )
+    _ids = itertools.count()
+
     def __init__(
         self,
         aht:tuple,
@@ -11,10 +19,16 @@ class Contact:
         contact_type:str='basic',
         shift_index:int=0,
         average_patience:float=None,
-        auto_solve_time:float=None
+        auto_solve_time:float=None,
+        arrival:float=None,
+        patience:float=None,
+        handling_draw:float=None,
+        rng:np.random.Generator=None,
+        id:int=None
     ):
-        self.id = str(uuid.uuid4())
-        self.arrival = round((random.uniform(0, 1) + shift_index) * interval, 2)
+        self.rng = rng if rng is not None else _default_rng
+        self.id = id if id is not None else next(Contact._ids) # Simulations pass their own ids
+        self.arrival = arrival if arrival is not None else round((self.rng.random() + shift_index) * interval, 2)
         self.contact_type = contact_type
         self.aht = aht
         self.status = "created"
@@ -23,8 +37,12 @@ class Contact:
         self.handling_time = None
         self.available_lines = None
         self.occupied_lines = None
-        self.patience = round(np.random.exponential(scale=average_patience) + (60 / interval),2) if average_patience else math.inf
+        if patience is not None:
+            self.patience = patience
+        else:
+            self.patience = round(self.rng.exponential(scale=average_patience) + (60 / interval),2) if average_patience else math.inf
         self.auto_solve_time = auto_solve_time if auto_solve_time else math.inf
+        self.handling_draw = handling_draw # Pre-drawn standard exponential variate (see ContactBatch)
 
     def set_lines(self, available:int, occupied:int):
         self.available_lines = available
@@ -43,7 +61,8 @@ class Contact:
         else:
             aht = self.aht[0] + self.aht[1] * max(concurrency, concurrency_floor)
             self.status = 'handled'
-            self.handling_time = max(min(round(np.random.exponential(scale=aht)), aht * 15), 0.1)
+            draw = self.handling_draw if self.handling_draw is not None else self.rng.standard_exponential()
+            self.handling_time = max(min(round(aht * draw), aht * 15), 0.1)
             self.concurrency = concurrency
             self.waiting_time = waiting_time
         return self
@@ -72,4 +91,69 @@ class Contact:
             'concurrency': self.concurrency,
             'available_lines':  self.available_lines,
             'occupied_lines': self.occupied_lines
-        }
\ No newline at end of file
+        }
+
+class ContactBatch:
+    """
+        Usage: Vectorised generation of all the contacts of one contact type for one interval. Arrivals, patience
+        and handling time variates are drawn as NumPy arrays in a single call each. Contacts are only
+        materialised when indexed (e.g. when their arrival event is popped from the calendar) and are cached,
+        so indexing the same position twice returns the same Contact.
+
+        Handling times are drawn as standard exponential variates and scaled by the AHT at handling start,
+        which is equivalent to drawing an exponential with scale=aht at that moment.
+
+        Arrivals are uniform within the interval, unless given by 'arrivals' (e.g. drawn from a
+        simulation_tools.RateProfile), in which case 'volume' is ignored. If 'first_id' is given, the contacts get
+        the ids first_id, first_id + 1, ... in batch order.
+    """
+    def __init__(
+        self,
+        rng:np.random.Generator,
+        volume:int,
+        aht:tuple,
+        interval:int,
+        contact_type:str='basic',
+        shift_index:int=0,
+        average_patience:float=None,
+        auto_solve_time:float=None,
+        arrivals:np.ndarray=None,
+        first_id:int=None
+    ):
+        if arrivals is not None:
+            volume = len(arrivals)
+        self.aht = aht
+        self.interval = interval
+        self.contact_type = contact_type
+        self.auto_solve_time = auto_solve_time
+        if arrivals is not None:
+            self.arrivals = np.round(arrivals, 2)
+        else:
+            self.arrivals = np.round((rng.random(volume) + shift_index) * interval, 2)
+        if average_patience:
+            self.patience = np.round(rng.exponential(scale=average_patience, size=volume) + (60 / interval), 2)
+        else:
+            self.patience = np.full(volume, math.inf)
+        self.handling_draws = rng.standard_exponential(volume)
+        self.rng = rng
+        self.first_id = first_id
+        self._contacts = [None] * volume
+
+    def __getitem__(self, idx:int) -> Contact:
+        contact = self._contacts[idx]
+        if contact is None:
+            contact = self._contacts[idx] = Contact(
+                aht = self.aht,
+                interval = self.interval,
+                contact_type = self.contact_type,
+                auto_solve_time = self.auto_solve_time,
+                arrival = float(self.arrivals[idx]),
+                patience = float(self.patience[idx]),
+                handling_draw = float(self.handling_draws[idx]),
+                rng = self.rng,
+                id = self.first_id + idx if self.first_id is not None else None
+            )
+        return contact
+
+    def __len__(self) -> int:
+        return len(self.arrivals)
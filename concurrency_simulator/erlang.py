@@ -0,0 +1,172 @@
+"""
+    Vectorised analytic approximations of the concurrency simulator, used to prune 'lines' grids before simulating.
+    All functions broadcast over NumPy arrays of servers (lines), traffic and rates.
+
+    Erlang C (M/M/N): infinite patience. Erlang A (M/M/N+M): exponential patience, solved on a truncated
+    birth-death chain. Neither model covers auto-solves (deterministic waiting time cap), which are ignored.
+"""
+import math
+import numpy as np
+
+def erlang_b(traffic, servers) -> np.ndarray:
+    """
+        Usage: Erlang B blocking probability, by the stable recursion B(n) = A B(n-1) / (n + A B(n-1)) evaluated
+        for every grid point at once up to the largest number of servers.
+    """
+    traffic, servers = np.broadcast_arrays(np.asarray(traffic, dtype=float), np.asarray(servers, dtype=np.int64))
+    b = np.ones(traffic.shape)
+    result = np.where(servers <= 0, 1.0, 0.0)
+    for n in range(1, int(servers.max(initial=0)) + 1):
+        b = traffic * b / (n + traffic * b)
+        result = np.where(servers == n, b, result)
+    return result
+
+def erlang_c(traffic, servers) -> np.ndarray:
+    """
+        Usage: Erlang C probability of waiting. 1 when traffic >= servers (unstable queue).
+    """
+    traffic, servers = np.broadcast_arrays(np.asarray(traffic, dtype=float), np.asarray(servers, dtype=float))
+    b = erlang_b(traffic, servers)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        c = servers * b / (servers - traffic * (1 - b))
+    return np.where(traffic < servers, c, 1.0)
+
+def erlang_c_kpis(arrival_rate, aht, servers, service_time:float) -> dict:
+    """
+        Usage: M/M/N KPIs. 'asa' is the average waiting time of handled contacts (all contacts are handled without
+        abandonment; infinite if unstable).
+    """
+    arrival_rate, aht, servers = np.broadcast_arrays(
+        np.asarray(arrival_rate, dtype=float), np.asarray(aht, dtype=float), np.asarray(servers, dtype=float)
+    )
+    traffic = arrival_rate * aht
+    p_wait = erlang_c(traffic, servers)
+    stable = traffic < servers
+    with np.errstate(invalid='ignore', divide='ignore'):
+        asa = np.where(stable, p_wait * aht / (servers - traffic), np.inf)
+        service_level = np.where(stable, 1 - p_wait * np.exp(-(servers - traffic) * service_time / aht), 0.0)
+    return {
+        'p_wait': p_wait,
+        'service_level': service_level,
+        'abandonment_rate': np.zeros(traffic.shape),
+        'asa': asa,
+        'occupancy': np.minimum(traffic / np.maximum(servers, 1), 1.0)
+    }
+
+def erlang_a_kpis(arrival_rate, aht, patience, servers, service_time:float) -> dict:
+    """
+        Usage: M/M/N+M (Erlang A) KPIs from the stationary distribution of the birth-death chain (births
+        'arrival_rate', deaths min(k, N) / aht + max(k - N, 0) / patience), truncated where the queue tail is
+        negligible. Falls back to Erlang C when 'patience' is infinite.
+
+        'asa' is the average waiting time of handled contacts, as in Simulation.get_kpis: a contact arriving with j
+        contacts queued ahead is handled with probability N mu / (N mu + (j + 1) theta) and then waits
+        sum_{i=0..j} 1 / (N mu + (i + 1) theta) on average (mu = 1 / aht, theta = 1 / patience).
+
+        The service level uses an exponential approximation of the waiting time of delayed contacts, with the
+        chain's mean delay over all contacts (Little's law): SL = 1 - P(wait) exp(-t / W) - P(abandon) (1 - exp(-t / W)).
+
+        Arguments:
+        -arrival_rate: contacts per time unit.
+        -aht: average handling time.
+        -patience: average patience (np.inf for none).
+        -servers: lines.
+        -service_time: waiting time threshold for the service level.
+    """
+    if np.all(np.isinf(patience)):
+        return erlang_c_kpis(arrival_rate, aht, servers, service_time)
+    arrival_rate, aht, patience, servers = np.broadcast_arrays(
+        np.asarray(arrival_rate, dtype=float), np.asarray(aht, dtype=float),
+        np.asarray(patience, dtype=float), np.asarray(servers, dtype=np.int64)
+    )
+    shape = servers.shape
+    arrival_rate, aht, patience, servers = (a.reshape(-1, 1) for a in (arrival_rate, aht, patience, servers))
+    patience_rate = np.where(np.isinf(patience), 0.0, 1 / patience)
+    queue_load = np.where(patience_rate > 0, arrival_rate / np.maximum(patience_rate, 1e-12), 0.0)
+    max_queue = int(np.ceil(np.max(queue_load + 10 * np.sqrt(queue_load + 1))) + 50)
+    states = np.arange(1, int(servers.max(initial=0)) + max_queue + 1).reshape(1, -1)
+    death_rates = np.minimum(states, servers) / aht + np.maximum(states - servers, 0) * patience_rate
+    log_pi = np.concatenate([np.zeros((len(servers), 1)), np.cumsum(np.log(arrival_rate / death_rates), axis=1)], axis=1)
+    pi = np.exp(log_pi - log_pi.max(axis=1, keepdims=True))
+    pi /= pi.sum(axis=1, keepdims=True)
+    all_states = np.arange(pi.shape[1]).reshape(1, -1)
+    queued = np.maximum(all_states - servers, 0)
+    p_wait = (pi * (all_states >= servers)).sum(axis=1)
+    mean_queue = (pi * queued).sum(axis=1)
+    abandonment_rate = mean_queue * patience_rate[:, 0] / arrival_rate[:, 0]
+    mean_wait = mean_queue / arrival_rate[:, 0] # Little's law, mean waiting time of all contacts
+    # Handled contacts only: P(handled | j ahead) and their expected wait H_j, gathered for every state
+    service_rate = servers / aht
+    stages = service_rate + np.arange(1, pi.shape[1] + 1).reshape(1, -1) * patience_rate
+    expected_wait = np.cumsum(1 / stages, axis=1)
+    ahead = np.maximum(all_states - servers, 0)
+    queued_state = all_states >= servers
+    p_handled = np.where(queued_state, service_rate / np.take_along_axis(stages, ahead, axis=1), 1.0)
+    waits = np.where(queued_state, np.take_along_axis(expected_wait, ahead, axis=1), 0.0)
+    handled = (pi * p_handled).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        asa = np.where(handled > 0, (pi * p_handled * waits).sum(axis=1) / handled, np.inf) # No lines: nothing handled
+        delay = np.where(p_wait > 0, mean_wait / p_wait, 0.0)
+        decay = np.where(delay > 0, np.exp(-service_time / delay), 0.0)
+    service_level = 1 - p_wait * decay - abandonment_rate * (1 - decay)
+    busy = (pi * np.minimum(all_states, servers)).sum(axis=1)
+    return {
+        'p_wait': p_wait.reshape(shape),
+        'service_level': np.clip(service_level, 0, 1).reshape(shape),
+        'abandonment_rate': abandonment_rate.reshape(shape),
+        'asa': asa.reshape(shape),
+        'occupancy': (busy / np.maximum(servers[:, 0], 1)).reshape(shape)
+    }
+
+def concurrency_kpis(
+    volumes:dict,
+    contact_types:dict,
+    interval:float,
+    lines,
+    max_concurrency:float,
+    service_time:float,
+    concurrency_floor:float = 0,
+    iterations:int = 30
+) -> dict:
+    """
+        Usage: Approximate KPIs of Simulation.coverage_test for a whole grid of 'lines' at once.
+        Contact types are pooled: arrival rates are summed, the AHT is the volume-weighted mix of every type's
+        a + b x concurrency and the abandonment rate is the volume-weighted mix of every type's 1 / patience
+        (average patience plus the simulator's 60 / interval offset, types without patience never abandon). Concurrency depends on occupancy (occupied / lines x max_concurrency), so AHT and
+        occupancy are solved by a damped fixed point iteration.
+
+        Arguments:
+        -volumes: contacts per interval for every contact type (as in Simulation.simulate).
+        -contact_types: Simulation.contact_types.
+        -interval: interval length.
+        -lines: number of lines, int or array (grid).
+        -max_concurrency, concurrency_floor: as in Simulation.
+        -service_time: waiting time threshold for the service level.
+        -iterations: fixed point iterations.
+
+        Returns: dictionary of arrays shaped like 'lines' (service_level, abandonment_rate, asa, occupancy,
+        p_wait, aht).
+    """
+    lines = np.asarray(lines, dtype=np.int64)
+    total = sum(volumes.values())
+    if total == 0:
+        zeros = np.zeros(lines.shape)
+        return {'service_level': zeros + 1, 'abandonment_rate': zeros, 'asa': zeros, 'occupancy': zeros, 'p_wait': zeros, 'aht': zeros}
+    weights = {ct: volumes[ct] / total for ct in volumes}
+    base = sum(weights[ct] * contact_types[ct]['aht'][0] for ct in volumes)
+    increment = sum(weights[ct] * contact_types[ct]['aht'][1] for ct in volumes)
+    patience_rate = sum(
+        weights[ct] / (contact_types[ct]['average_patience'] + 60 / interval)
+        for ct in volumes
+        if contact_types[ct]['average_patience']
+    )
+    patience = 1 / patience_rate if patience_rate else math.inf
+    arrival_rate = total / interval
+
+    occupancy = np.minimum(arrival_rate * base / np.maximum(lines, 1), 1.0)
+    for _ in range(iterations):
+        aht = base + increment * np.maximum(occupancy * max_concurrency, concurrency_floor)
+        kpis = erlang_a_kpis(arrival_rate, aht, patience, lines, service_time)
+        occupancy = 0.5 * occupancy + 0.5 * kpis['occupancy']
+    kpis['aht'] = aht
+    return kpis
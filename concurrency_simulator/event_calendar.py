@@ -0,0 +1,73 @@
+import heapq
+import itertools
+
+from .event import Event
+
+class EventCalendar:
+    """
+        Usage: Priority queue of simulation events keyed on (time, sequence). The sequence number is
+        assigned on insertion, so events sharing the same time (e.g. an arrival and a solve) are
+        served in the order they were scheduled. This is the same order the previous stable sort
+        over the events list produced, which keeps seeded runs bit-identical.
+
+        Entries are stored as (time, seq, event_type, items, index) and the Event is only built when
+        popped, with item = items[index]. This lets 'push_many' schedule a whole batch of events whose
+        items are materialised lazily (see ContactBatch).
+    """
+    def __init__(self, events:list=None):
+        self._heap = list()
+        self._counter = itertools.count()
+        if events:
+            self.extend(events)
+
+    def push(self, event:Event) -> "EventCalendar":
+        heapq.heappush(self._heap, (event.time, next(self._counter), event.event_type, (event.item,), 0))
+        return self
+
+    def extend(self, events:list) -> "EventCalendar":
+        for event in events:
+            self._heap.append((event.time, next(self._counter), event.event_type, (event.item,), 0))
+        heapq.heapify(self._heap)
+        return self
+
+    def push_many(self, times, event_type:str, items) -> "EventCalendar":
+        """
+            Usage: Schedule len(times) events of 'event_type'. Event i gets time times[i] and item items[i],
+            'items' is only indexed when the event is popped.
+        """
+        counter = self._counter
+        self._heap.extend((time, next(counter), event_type, items, idx) for idx, time in enumerate(times))
+        heapq.heapify(self._heap)
+        return self
+
+    def __getstate__(self) -> dict:
+        # itertools.count is not copied/pickled, the copy keeps numbering from the current sequence
+        return {'heap': self._heap, 'seq': next(self._counter)}
+
+    def __setstate__(self, state:dict) -> None:
+        self._heap = state['heap']
+        self._counter = itertools.count(state['seq'])
+
+    def pop(self) -> Event:
+        time, _, event_type, items, idx = heapq.heappop(self._heap)
+        return Event(item=items[idx], event_type=event_type, time=time)
+
+    @property
+    def next(self) -> Event:
+        if not self._heap:
+            return None
+        time, _, event_type, items, idx = self._heap[0]
+        return Event(item=items[idx], event_type=event_type, time=time)
+
+    @property
+    def next_time(self) -> float:
+        return self._heap[0][0] if self._heap else float('inf')
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self):
+        return (Event(item=items[idx], event_type=event_type, time=time) for time, _, event_type, items, idx in sorted(self._heap, key=lambda entry: entry[:2]))
+
+    def __repr__(self):
+        return f"EventCalendar(length={len(self)})"
@@ -0,0 +1,104 @@
+import numpy as np
+
+from simulation_tools.contact_store import ContactStore
+
+FLOAT_COLUMNS = ('arrival', 'waiting_time', 'handling_time', 'patience', 'concurrency')
+INT_COLUMNS = ('id', 'available_lines', 'occupied_lines')
+OBJECT_COLUMNS = ('status', 'contact_type')
+COLUMNS = ('id', 'arrival', 'waiting_time', 'handling_time', 'patience', 'status', 'contact_type', 'concurrency', 'available_lines', 'occupied_lines')
+GROUPS = ('handled', 'missed', 'solved', 'waiting')
+
+class Results:
+    """
+        Usage: Columnar, lazily materialised view of the contacts of a Simulation. Columns are NumPy arrays built on
+        first access and cached, as are the dictionaries behind 'records'. Missing values are NaN in
+        float columns and -1 in integer columns.
+
+        Groups: 'handled', 'missed', 'solved' (handled followed by missed) and 'waiting'.
+        Columns: id, arrival, waiting_time, handling_time, patience, status, contact_type, concurrency,
+        available_lines and occupied_lines.
+    """
+    def __init__(self, handled, missed, waiting):
+        self._sources = {'handled': handled, 'missed': missed, 'waiting': waiting}
+        self._columns = {group: dict() for group in GROUPS}
+        self._records = dict()
+
+    def column(self, group:str, name:str) -> np.ndarray:
+        columns = self._columns[group]
+        if name not in columns:
+            if group == 'solved':
+                columns[name] = np.concatenate([self.column('handled', name), self.column('missed', name)])
+            else:
+                columns[name] = _build_column(self._sources[group], name)
+        return columns[name]
+
+    def columns(self, group:str) -> dict:
+        return {name: self.column(group, name) for name in COLUMNS}
+
+    def records(self, group:str) -> list:
+        """
+            Usage: Contacts of 'group' as a list of dictionaries (same keys as Contact.to_dict). Built once and cached,
+            every call returns a new list of copies, so callers can sort or edit it.
+        """
+        return [dict(record) for record in self._cached_records(group)]
+
+    def _cached_records(self, group:str) -> list:
+        if group not in self._records:
+            if group == 'solved':
+                self._records[group] = [*self._cached_records('handled'), *self._cached_records('missed')]
+            else:
+                source = self._sources[group]
+                self._records[group] = source.to_dicts() if isinstance(source, ContactStore) else [c.to_dict() for c in source]
+        return self._records[group]
+
+    def length(self, group:str) -> int:
+        if group == 'solved':
+            return self.length('handled') + self.length('missed')
+        return len(self._sources[group])
+
+    @property
+    def handled(self) -> dict:
+        return self.columns('handled')
+    @property
+    def missed(self) -> dict:
+        return self.columns('missed')
+    @property
+    def solved(self) -> dict:
+        return self.columns('solved')
+    @property
+    def waiting(self) -> dict:
+        return self.columns('waiting')
+
+    #EXPORTS
+    def to_pandas(self, group:str='solved'):
+        """
+            Usage: Columns of 'group' as a pandas DataFrame. Requires pandas.
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Results | 'to_pandas' requires pandas to be installed.")
+        return pd.DataFrame(self.columns(group))
+
+    def to_arrow(self, group:str='solved'):
+        """
+            Usage: Columns of 'group' as a pyarrow Table. Requires pyarrow.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Results | 'to_arrow' requires pyarrow to be installed.")
+        return pa.table({name: (values.tolist() if values.dtype == object else values) for name, values in self.columns(group).items()})
+
+    def __repr__(self):
+        return f"Results({', '.join(f'{group}={self.length(group)}' for group in GROUPS)})"
+
+def _build_column(source, name:str) -> np.ndarray:
+    if isinstance(source, ContactStore):
+        return source.column(name)
+    values = [getattr(c, name) for c in source]
+    if name in FLOAT_COLUMNS:
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+    if name in INT_COLUMNS:
+        return np.array([-1 if v is None else v for v in values], dtype=np.int64)
+    return np.array(values, dtype=object)
@@ -1,8 +1,40 @@
 import numpy as np
-import random
+import functools, copy, io, os, pickle
+from concurrent.futures import ProcessPoolExecutor
 
-from .contact import Contact
+from simulation_tools.replications import run_replications
+from simulation_tools.contact_store import ContactStore
+from simulation_tools.kpis import KpiAccumulator, DiscardedRecords
+from simulation_tools.steady_state import steady_state
+from simulation_tools.cache import ResultCache, fingerprint
+from simulation_tools.profiling import Profiler
+from simulation_tools.arrivals import RateProfile, poisson_arrivals
+
+from .contact import Contact, ContactBatch
 from .event import Event
+from .event_calendar import EventCalendar
+from .results import Results
+from .erlang import concurrency_kpis
+
+# Columns of the ContactStore used for handled/missed contacts when compact=True (same keys as Contact.to_dict)
+CONTACT_FIELDS = [
+    ('id', 'int'),
+    ('arrival', 'float'),
+    ('waiting_time', 'float'),
+    ('handling_time', 'float'),
+    ('patience', 'float'),
+    ('status', 'category'),
+    ('contact_type', 'category'),
+    ('concurrency', 'float'),
+    ('available_lines', 'int'),
+    ('occupied_lines', 'int')
+]
+
+def _contact_row(c:Contact) -> tuple:
+    return (
+        c.id, c.arrival, c.waiting_time, c.handling_time, c.patience, c.status, 
+        c.contact_type, c.concurrency, c.available_lines, c.occupied_lines
+    )
 
 class Simulation:
     def __init__(
@@ -10,53 +42,142 @@ class Simulation:
         interval:int,
         max_concurrency:int,
         contact_types:dict=None,
-        concurrency_floor:float = 0
+        concurrency_floor:float = 0,
+        seed:int = None,
+        compact:bool = False,
+        service_time:float = None,
+        keep_records:bool = True,
+        cache:ResultCache = None
     ):
         #Attributes
+        self.rng = np.random.default_rng(seed) # seed: int, SeedSequence or an injected Generator
+        self._seeded = seed is not None # Unseeded runs are never cached (their keys can't be hit again)
         self.interval = interval
         self.max_concurrency = max_concurrency
         self.contact_types = dict()
         self.concurrency_floor = concurrency_floor
+        self.compact = compact # Store handled/missed contacts in ContactStores instead of lists
+        self.service_time = service_time # Service level threshold of the streaming KPIs
+        self.keep_records = keep_records # If False, handled/missed contacts are only counted (see 'kpi_accumulator')
+        self.cache = cache # Optional on-disk ResultCache for tests, replications and day plans
+        self.profiler = None # Set by 'enable_profiling'
         #Simulation Carries
         self.chain_position = 0
         self.current = 0
         self.waiting = list() # of Contacts
-        self.events = list() # of Events
+        self.events = EventCalendar()
         #Outputs
-        self.handled = list() # of Contacts
-        self.missed = list() # of Contacts
+        self.handled = self._new_output() # of Contacts
+        self.missed = self._new_output() # of Contacts
         #Accumulators
         self.lines_acc = list()
+        self.busy_acc = list() # Occupied line time of every interval
         self.handling_time_acc = 0
+        self.kpi_accumulator = KpiAccumulator(service_time, interval=interval)
+        self.warmup_intervals = 0 # Leading intervals excluded from 'get_kpis' (set by a steady-state 'coverage_test')
+        self._results = None
+        self.contacts_created = 0 # Contact ids are assigned per simulation, restarting at 'reset'
 
     # Reset
     def reset(self):
         self.waiting = []
-        self.events = []
+        self.events = EventCalendar()
         self.current = 0
         self.chain_position = 0
         self.lines_acc = list()
+        self.busy_acc = list()
+        self.handling_time_acc = 0
         self.volumes_acc = 0
-        self.handled = []
-        self.missed = []
+        self.handled = self._new_output()
+        self.missed = self._new_output()
+        self.kpi_accumulator = KpiAccumulator(self.service_time, interval=self.interval)
+        self.warmup_intervals = 0
+        self.contacts_created = 0
+        self._results = None
+
+    def _new_output(self):
+        if not self.keep_records:
+            return DiscardedRecords()
+        return ContactStore(CONTACT_FIELDS, _contact_row) if self.compact else list()
+
+    @property
+    def results(self) -> Results:
+        """
+            Usage: Columnar view of the handled, missed, solved and waiting contacts. Built lazily, cached until
+            the next 'simulate' or 'reset'.
+        """
+        if self._results is None:
+            self._results = Results(self.handled, self.missed, self.waiting)
+        return self._results
         
     def get_handled(self) -> list:
-        return [r.to_dict() for r in self.handled]
+        return self.results.records('handled')
     
     def get_missed(self) -> list:
-        return [r.to_dict() for r in self.missed]
+        return self.results.records('missed')
     
     def get_solved(self) -> list:
-        return [*self.get_handled(),*self.get_missed()] 
+        return self.results.records('solved')
         
     def get_waiting(self) -> list:
-        return [r.to_dict() for r in self.waiting]
+        return self.results.records('waiting')
     
     def get_agent_time(self) -> float:
         return np.sum(self.lines_acc) * (self.interval)/ self.max_concurrency
     
     def get_handling_times(self) -> float:
         return self.handling_time_acc
+
+    def get_kpis(self, service_time:float, warmup:int=None) -> dict:
+        """
+            Usage: KPIs of the contacts solved so far (handled + missed). Contacts still waiting are not counted.
+            Arguments:
+            -service_time: waiting time threshold for the service level. If records are not kept, the service level
+            comes from 'kpi_accumulator' (exact for the simulation's own 'service_time', estimated otherwise).
+            -warmup: Optional, leading intervals to exclude (contacts arriving in them and their line time).
+            Defaults to 'warmup_intervals'.
+            Returns: dictionary with 'service_level' (handled within 'service_time' / offered), 'abandonment_rate'
+            (abandoned / offered), 'asa' (average waiting time of handled contacts) and 'occupancy' (occupied line
+            time / available line time, both within the measured intervals).
+        """
+        warmup = self.warmup_intervals if warmup is None else warmup
+        line_time = np.sum(self.lines_acc[warmup:]) * self.interval
+        occupancy = float(np.sum(self.busy_acc[warmup:]) / line_time) if line_time else float('nan')
+        if not self.keep_records:
+            return {**self._accumulator_kpis(service_time, warmup), 'occupancy': occupancy}
+        handled = self.results.column('handled', 'arrival') >= warmup * self.interval
+        missed = self.results.column('missed', 'arrival') >= warmup * self.interval
+        waiting_times = self.results.column('handled', 'waiting_time')[handled]
+        offered = len(waiting_times) + int(missed.sum())
+        return {
+            'service_level': float(np.sum(waiting_times <= service_time) / offered) if offered else float('nan'),
+            'abandonment_rate': float(np.sum(self.results.column('missed', 'status')[missed] == 'abandoned') / offered) if offered else float('nan'),
+            'asa': float(waiting_times.mean()) if len(waiting_times) else float('nan'),
+            'occupancy': occupancy
+        }
+
+    def _accumulator_kpis(self, service_time:float, warmup:int) -> dict:
+        if not warmup:
+            kpis = self.kpi_accumulator.kpis(service_time)
+        else:
+            # Per-interval counters after the warm-up. The service level is exact for the accumulator's own
+            # 'service_time', otherwise the whole run's answered fraction is applied to the kept contacts
+            breakdown = {name: values[warmup:].sum() for name, values in self.kpi_accumulator.interval_kpis().items()}
+            offered, handled = breakdown['offered'], breakdown['handled']
+            if service_time == self.kpi_accumulator.service_time:
+                answered = breakdown['answered']
+            else:
+                answered = self.kpi_accumulator.answered_within(service_time) / max(self.kpi_accumulator.handled, 1) * handled
+            kpis = {
+                'service_level': answered / offered if offered else float('nan'),
+                'abandonment_rate': breakdown['abandoned'] / offered if offered else float('nan'),
+                'asa': breakdown['waiting_time'] / handled if handled else float('nan')
+            }
+        return {
+            'service_level': float(kpis['service_level']),
+            'abandonment_rate': float(kpis['abandonment_rate']),
+            'asa': float(kpis['asa'])
+        }
         
     # Add and Remove Contact Types
     def add_contact_type(
@@ -95,22 +216,54 @@ class Simulation:
     def list_contact_types(self) -> list:
         return list(self.contact_types.keys())
     
+    #PROFILING
+    def enable_profiling(self, sample_every:int=1) -> Profiler:
+        """
+            Usage: Instrument this simulation (see simulation_tools.Profiler). Times 'simulate',
+            '_generate_contact_batches', '_handle_arriving_contact' (calls = processed arrivals) and
+            '_handle_next_waiting' (calls = contacts leaving the waiting list), and samples the waiting list, calendar
+            and busy lines before every 'sample_every'-th arrival. Only the instance is patched: nothing is
+            instrumented before this call or after 'disable_profiling'.
+        """
+        self.disable_profiling()
+        self.profiler = Profiler(sample_every)
+        sample = self.profiler.sampler(
+            lambda contact, handling_start, lines: (
+                handling_start, {'waiting': len(self.waiting), 'calendar': len(self.events), 'busy': self.current}
+            )
+        )
+        self.profiler.wrap(self, 'simulate')
+        self.profiler.wrap(self, '_generate_contact_batches')
+        self.profiler.wrap(self, '_handle_arriving_contact', before=sample)
+        self.profiler.wrap(self, '_handle_next_waiting')
+        return self.profiler
+
+    def disable_profiling(self) -> Profiler:
+        profiler, self.profiler = self.profiler, None
+        if profiler:
+            profiler.detach()
+        return profiler
+
     #SIMULATION HELPER METHODS
-    def _generate_events_list(self, volumes:dict) -> list:
-        new_events = []
+    def _generate_contact_batches(self, volumes:dict) -> list:
+        start, end = self.chain_position * self.interval, (self.chain_position + 1) * self.interval
+        batches = list()
         for ct_name, ct in self.contact_types.items():
-            for _ in range(volumes[ct_name]):
-                new_contact = Contact(
-                    aht = ct['aht'], 
-                    interval = self.interval,
-                    contact_type = ct_name,
-                    shift_index = self.chain_position,
-                    average_patience = ct['average_patience'],
-                    auto_solve_time = ct['auto_solve_time']
-                )
-                new_events.append(Event(item=new_contact, time=new_contact.arrival_time, event_type='arrival'))
-
-        return new_events
+            batch = ContactBatch(
+                rng = self.rng,
+                volume = volumes[ct_name] if not isinstance(volumes[ct_name], RateProfile) else None,
+                arrivals = poisson_arrivals(volumes[ct_name], start, end, self.rng) if isinstance(volumes[ct_name], RateProfile) else None,
+                aht = ct['aht'], 
+                interval = self.interval,
+                contact_type = ct_name,
+                shift_index = self.chain_position,
+                average_patience = ct['average_patience'],
+                auto_solve_time = ct['auto_solve_time'],
+                first_id = self.contacts_created
+            )
+            self.contacts_created += len(batch)
+            batches.append(batch)
+        return batches
 
     def _handle_next_waiting(self, handling_start:float ,lines:int):
         waiting_contact:Contact = self.waiting.pop(0)
@@ -122,9 +275,11 @@ class Simulation:
             waiting_contact.set_lines(available=lines, occupied=self.current)
             self.handled.append(waiting_contact)
             self.handling_time_acc += waiting_contact.handling_time
-            self.events.append(Event(item=waiting_contact, time=waiting_contact.end_time, event_type='solve'))
+            self.kpi_accumulator.add_handled(waiting_contact.arrival, waiting_contact.waiting_time, waiting_contact.handling_time)
+            self.events.push(Event(item=waiting_contact, time=waiting_contact.end_time, event_type='solve'))
         else:
             self.missed.append(waiting_contact)
+            self.kpi_accumulator.add_missed(waiting_contact.arrival, waiting_contact.status)
            
     def _handle_arriving_contact(self, new_contact:Contact, handling_start:float, lines:int):
         if self.current < lines:
@@ -134,7 +289,8 @@ class Simulation:
             new_contact.set_lines(available=lines, occupied=self.current)
             self.handled.append(new_contact)
             self.handling_time_acc += new_contact.handling_time
-            self.events.append(Event(item=new_contact, time=new_contact.end_time, event_type='solve'))
+            self.kpi_accumulator.add_handled(new_contact.arrival, new_contact.waiting_time, new_contact.handling_time)
+            self.events.push(Event(item=new_contact, time=new_contact.end_time, event_type='solve'))
         else:
             self.waiting.append(new_contact)
     
@@ -142,27 +298,31 @@ class Simulation:
     def simulate(self, volumes:dict, lines:int):
         # Verify that volumes match contact types
         if set(volumes.keys()) != set(self.contact_types.keys()):
-            print(f"ValErr: 'volumes' don't match 'contact_types'. Make sure 'volumes' has \
-                      integer values for the following keys: {self.contact_types.keys()}")
+            print(f"ValErr: 'volumes' don't match 'contact_types'. Make sure 'volumes' has contacts per interval \
+                      or a RateProfile for the following keys: {self.contact_types.keys()}")
         
         # Assign All Waiting Contacts to Newly Available Lines (if any are available)
         while lines > self.current and len(self.waiting):
                 self._handle_next_waiting(self.chain_position * self.interval ,lines)
         
-        # Generate All Contacts & Events
-        new_events = self._generate_events_list(volumes)
-        self.events = [*self.events, *new_events]
+        # Generate All Contacts & Events (contacts are materialised when their arrival is processed)
+        # Volumes are contacts per interval, or RateProfiles (non-homogeneous Poisson arrivals over this interval)
+        for batch in self._generate_contact_batches(volumes):
+            self.events.push_many(batch.arrivals.tolist(), 'arrival', batch)
 
-        #Iterate Through All Events
+        #Iterate Through All Events (occupied line time is integrated between events, contacts carried over a
+        #drop in lines only occupy the available ones)
+        interval_end = (1 + self.chain_position) * self.interval
+        busy, last_time = 0.0, self.chain_position * self.interval
         while len(self.events) > 0:
-            self.events = sorted(self.events, key = lambda event: event.time)
-            next_event:Event = self.events.pop(0)
-            #Overflows Iterval
-            if next_event.time >= (1 + self.chain_position) * self.interval:
-                self.events.append(next_event)
+            #Overflows Iterval (stays in the calendar for the next chain position)
+            if self.events.next_time >= interval_end:
                 break
+            next_event:Event = self.events.pop()
+            busy += min(self.current, lines) * (next_event.time - last_time)
+            last_time = next_event.time
             #Event Is Arrival
-            elif(next_event.istype('arrival')):
+            if(next_event.istype('arrival')):
                 self._handle_arriving_contact(next_event.item, handling_start=next_event.time, lines=lines)
             #Event Is Solve
             else:
@@ -170,25 +330,70 @@ class Simulation:
                 while len(self.waiting) > 0 and lines > self.current:
                     self._handle_next_waiting(next_event.time,lines)
     
+        busy += min(self.current, lines) * (interval_end - last_time)
+        
         self.chain_position += 1
         self.lines_acc.append(lines)
+        self.busy_acc.append(busy)
+        self._results = None
         
     #SIMULATION ITERATORS
-    def coverage_test(self, volumes:dict, lines:int, intervals:int=10) -> None:
+    def coverage_test(
+        self,
+        volumes:dict,
+        lines:int,
+        intervals:int=10,
+        precision:float=None,
+        max_intervals:int=100,
+        steady_kpi:str='asa',
+        confidence:float=0.95
+    ) -> dict:
         """
             Usage: This test will perform the simulation for a set amount of consecutive intervals, 
             with a fixed number of lines and volumes. This is useful to understand the equilibrium 
             state of this specific level of coverage for a certain amount of traffic.
+            If 'precision' is set, 'intervals' is only the minimum: the test keeps simulating until the equilibrium
+            estimate of 'steady_kpi' is stable (see 'simulation_tools.steady_state', MSER warm-up truncation over
+            the completed intervals) or 'max_intervals' is reached. The detected warm-up is stored in
+            'warmup_intervals' and excluded from 'get_kpis'.
             
             Arguments:
             -volumes: Volumes dictionary. Direct input for the 'simulate' method.
             -lines: Lines available to answer contacts. Direct input for the 'simulate' methiod.
             -intervals: Number of consecutive intervals (iterations) to simulate.
+            -precision: Optional, relative confidence interval half-width of the steady state estimate (e.g. 0.05).
+            -max_intervals: Maximum number of intervals when 'precision' is set.
+            -steady_kpi: Per-interval KPI watched for convergence, one of 'asa', 'abandonment_rate' or
+            'service_level' (the latter needs the simulation's 'service_time').
+            -confidence: Confidence level of the half-width.
+
+            Returns: None, or the steady state estimate (see 'steady_state') if 'precision' is set.
         """
-        
+        return self._cached_run(
+            'coverage_test',
+            (volumes, lines, intervals, precision, max_intervals, steady_kpi, confidence),
+            functools.partial(self._coverage_test, volumes, lines, intervals, precision, max_intervals, steady_kpi, confidence)
+        )
+
+    def _coverage_test(self, volumes, lines, intervals, precision, max_intervals, steady_kpi, confidence) -> dict:
         self.reset()
         for _ in range(intervals):
             self.simulate(volumes, lines)
+        if precision is None:
+            return None
+        if steady_kpi == 'service_level' and self.service_time is None:
+            print("ValErr: 'steady_kpi' 'service_level' requires the simulation's 'service_time'.")
+            return None
+        while True:
+            # The last interval is incomplete (its contacts may still be waiting or in the calendar)
+            series = self.kpi_accumulator.interval_kpis()[steady_kpi][:self.chain_position - 1]
+            state = steady_state(series, precision, confidence)
+            if state['converged'] or self.chain_position >= max_intervals:
+                break
+            self.simulate(volumes, lines)
+        state['intervals'] = self.chain_position
+        self.warmup_intervals = state['warmup']
+        return state
             
     def transition_test(self, volumes_start:dict, volumes_end:dict, lines_start:int, lines_end:int, intervals_start:int=10, intervals_end:int=1) -> None:
         """
@@ -204,13 +409,518 @@ class Simulation:
             -intervals_start: Number of consecutive intervals (iterations) to simulate on 'start' stage.
             -intervals_end: Number of consecutive intervals (iterations) to simulate on 'end' stage.
         """
-        
+        return self._cached_run(
+            'transition_test',
+            (volumes_start, volumes_end, lines_start, lines_end, intervals_start, intervals_end),
+            functools.partial(self._transition_test, volumes_start, volumes_end, lines_start, lines_end, intervals_start, intervals_end)
+        )
+
+    def _transition_test(self, volumes_start, volumes_end, lines_start, lines_end, intervals_start, intervals_end) -> None:
         self.reset()
         for _ in range(intervals_start):
             self.simulate(volumes_start, lines_start)
         for _ in range(intervals_end):
             self.simulate(volumes_end, lines_end)
             
+    #DAY PLANS
+    def simulate_day(
+        self,
+        volumes:dict,
+        coverage,
+        service_time:float,
+        seed:int=None,
+        workers:int=None,
+        drain_intervals:int=1
+    ):
+        """
+            Usage: Simulate a whole day plan, interval by interval, from NumPy arrays, for one or many coverage
+            variants (e.g. the outputs of the coverage transforms). Variants run across a process pool, each on a
+            fresh copy of this simulation setup with the same seed (common random numbers), so their differences
+            come from the coverage only. This instance is not modified.
+            
+            Arguments:
+            -volumes: dictionary of contact type -> array of volumes per interval (fractional volumes are rounded up or
+            down at random, the same way for every variant) or RateProfile (see 'simulate').
+            -coverage: lines per interval. A 1D array (one plan), a 2D array (one plan per row) or a dictionary of
+            name -> 1D array. Fractional lines (e.g. 'shrinkage_transform' outputs) are rounded to the nearest integer,
+            the reported 'lines' and 'agent_time' are those of the rounded plan.
+            -service_time: Waiting time threshold for the service level.
+            -seed: Optional, seed shared by all variants. Drawn from this simulation's generator if ommitted.
+            -workers: Optional, number of worker processes. Defaults to the number of cores, 1 runs in-process.
+            -drain_intervals: Extra intervals without arrivals (keeping the last interval's lines) simulated at the
+            end of the day, so that the contacts of the last intervals are solved.
+
+            Returns: for every variant (same structure as 'coverage'), a dictionary of per-interval arrays (by arrival
+            interval): 'lines', 'offered', 'handled', 'service_level', 'abandonment_rate', 'asa' and 'occupancy'
+            (occupied line time / line time of the interval), plus 'totals' ('get_kpis' of the whole day) and
+            'agent_time'.
+        """
+        volumes = {ct: values if isinstance(values, RateProfile) else np.asarray(values) for ct, values in volumes.items()}
+        if isinstance(coverage, dict):
+            names, plans = list(coverage.keys()), [np.asarray(plan) for plan in coverage.values()]
+        else:
+            coverage = np.asarray(coverage)
+            names, plans = None, list(coverage) if coverage.ndim == 2 else [coverage]
+        arrays = [values for values in volumes.values() if not isinstance(values, RateProfile)]
+        if any(values.shape != plans[0].shape for values in [*arrays, *plans]):
+            print("ValErr: 'volumes' and 'coverage' arrays must all have one value per interval.")
+            return None
+        cached = seed is not None or self._seeded
+        if seed is None:
+            seed = int(self.rng.integers(2**32))
+        outcomes, _ = self._simulate_plans(volumes, plans, service_time, seed, workers, drain_intervals, cached)
+        if names is not None:
+            return dict(zip(names, outcomes))
+        return outcomes if coverage.ndim == 2 else outcomes[0]
+
+    def _simulate_plans(
+        self, volumes:dict, plans:list, service_time:float, seed:int, workers:int, drain_intervals:int, cached:bool=True
+    ) -> tuple:
+        # Outcomes of every plan (looked up in / stored to 'cache' if set and 'cached', i.e. the seed is reproducible)
+        # and the number of plans simulated. Plans are simulated with whole lines
+        cache = self.cache if cached else None
+        plans = [np.round(np.asarray(plan, dtype=float)).astype(np.int64) for plan in plans]
+        keys = [fingerprint('day_plan', volumes, plan, service_time, drain_intervals, seed, self._config()) for plan in plans]
+        outcomes = [cache.get(key) if cache is not None else None for key in keys]
+        missing = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        runner = functools.partial(_day_plan_run, self._config(), volumes, service_time, drain_intervals, seed)
+        workers = min(workers if workers else os.cpu_count() or 1, len(missing))
+        if workers <= 1:
+            computed = [runner(plans[i]) for i in missing]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                computed = list(executor.map(runner, [plans[i] for i in missing]))
+        for i, outcome in zip(missing, computed):
+            outcomes[i] = outcome
+            if cache is not None:
+                cache.put(keys[i], outcome)
+        return outcomes, len(missing)
+
+    def sweep_transforms(
+        self,
+        volumes:dict,
+        coverage:np.ndarray,
+        service_time:float,
+        f_log:dict=None,
+        t_smooth:dict=None,
+        unit:float=1,
+        kpi:str='service_level',
+        seed:int=None,
+        workers:int=None,
+        drain_intervals:int=1
+    ) -> dict:
+        """
+            Usage: Parameter sweep of the coverage transforms. Every combination of the given parameter values is
+            applied to 'coverage' at once (parameters broadcast along a leading axis): 'f_log_transform' first, then
+            't_smooth_transform'. Resulting plans are rounded to whole lines and identical ones are simulated once,
+            through the same day plan runs (and 'cache' lookups, if set) as 'simulate_day', across the worker pool.
+            Non-finite transform outputs (f_log of 0 lines) keep the original coverage.
+            
+            Arguments:
+            -volumes: dictionary of contact type -> array of volumes per interval or RateProfile (see 'simulate_day').
+            -coverage: 1D array of lines per interval.
+            -service_time: Waiting time threshold for the service level.
+            -f_log: Optional, {'power': values, 'threshold': values} for 'f_log_transform'.
+            -t_smooth: Optional, {'smooth_factor': values} for 't_smooth_transform'.
+            -unit: rounding unit of the transforms.
+            -kpi: 'service_level' (higher is better), 'asa' or 'abandonment_rate' (lower is better) for the frontier.
+            -seed: Optional, seed shared by every plan. Drawn from this simulation's generator if ommitted.
+            -workers, drain_intervals: Direct inputs for the 'simulate_day' method.
+
+            Returns: {'parameters': list of parameter dictionaries, 'coverage': 2D array of plans (one row per
+            combination), 'kpi': array of the day total 'kpi' per combination, 'cost': array of agent time per
+            combination, 'plans': list of 'simulate_day' outcomes per combination, 'frontier': combination indices of
+            the KPI-vs-cost Pareto frontier (one per distinct plan) sorted by cost, 'simulated': plans simulated by
+            this call}
+        """
+        coverage = np.asarray(coverage, dtype=float)
+        grids = {
+            'power': (f_log or {}).get('power'),
+            'threshold': (f_log or {}).get('threshold'),
+            'smooth_factor': (t_smooth or {}).get('smooth_factor')
+        }
+        grids = {name: np.atleast_1d(values) for name, values in grids.items() if values is not None}
+        if f_log is not None and not {'power', 'threshold'} <= grids.keys():
+            print("ValErr: 'f_log' requires 'power' and 'threshold' values.")
+            return None
+        mesh = np.meshgrid(*grids.values(), indexing='ij')
+        parameters = {name: values.reshape(-1, 1) for name, values in zip(grids, mesh)}
+        combinations = len(next(iter(parameters.values()))) if parameters else 1
+
+        plans = np.broadcast_to(coverage, (combinations, len(coverage)))
+        if f_log is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                transformed = self.f_log_transform(plans, parameters['power'], parameters['threshold'], unit)
+            plans = np.where(np.isfinite(transformed), transformed, plans)
+        if t_smooth is not None:
+            plans = self.t_smooth_transform(plans, parameters['smooth_factor'], unit)
+        plans = np.round(np.clip(plans, 0, None))
+
+        cached = seed is not None or self._seeded
+        if seed is None:
+            seed = int(self.rng.integers(2**32))
+        unique, inverse = np.unique(plans, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        volumes = {ct: values if isinstance(values, RateProfile) else np.asarray(values) for ct, values in volumes.items()}
+        outcomes, simulated = self._simulate_plans(volumes, list(unique), service_time, seed, workers, drain_intervals, cached)
+        values = np.array([outcome['totals'][kpi] for outcome in outcomes])
+        costs = np.array([outcome['agent_time'] for outcome in outcomes])
+        #Pareto frontier over distinct plans: by increasing cost, keep plans strictly improving the KPI
+        better = (lambda a, b: a > b) if kpi == 'service_level' else (lambda a, b: a < b)
+        frontier, best = list(), None
+        for i in np.lexsort((-values if kpi == 'service_level' else values, costs)):
+            if not np.isnan(values[i]) and (best is None or better(values[i], best)):
+                frontier.append(int(np.flatnonzero(inverse == i)[0]))
+                best = values[i]
+        return {
+            'parameters': [{name: float(values[c, 0]) for name, values in parameters.items()} for c in range(combinations)],
+            'coverage': plans,
+            'kpi': values[inverse],
+            'cost': costs[inverse],
+            'plans': [outcomes[i] for i in inverse],
+            'frontier': frontier,
+            'simulated': simulated
+        }
+
+    #REPLICATIONS
+    def replicate_coverage_test(
+        self, 
+        volumes:dict, 
+        lines:int, 
+        service_time:float, 
+        intervals:int=10, 
+        replications:int=30, 
+        seed:int=None, 
+        workers:int=None, 
+        confidence:float=0.95
+    ) -> dict:
+        """
+            Usage: Run 'replications' independent 'coverage_test's of this simulation setup across a process pool
+            and aggregate their KPIs (see 'get_kpis') with confidence intervals. This instance is not modified.
+            
+            Arguments:
+            -volumes, lines, intervals: Direct inputs for the 'coverage_test' method.
+            -service_time: Direct input for the 'get_kpis' method.
+            -replications: Number of independent replications.
+            -seed: Optional, root seed. Replication seeds are spawned from it (see 'run_replications').
+            -workers: Optional, number of worker processes. Defaults to the number of cores.
+            -confidence: Confidence level of the intervals.
+        """
+        runner = functools.partial(_coverage_test_replication, self._config(), volumes, lines, intervals, service_time)
+        run = functools.partial(run_replications, runner, replications, seed=seed, workers=workers, confidence=confidence)
+        if self.cache is None or seed is None:
+            return run()
+        key = fingerprint('replicate_coverage_test', volumes, lines, service_time, intervals, replications, seed, confidence, self._config())
+        return self.cache.get_or_compute(key, run)
+
+    #ANALYTIC SEARCH
+    def analytic_kpis(self, volumes:dict, lines, service_time:float, intervals:int=1) -> dict:
+        """
+            Usage: Approximate (Erlang A / Erlang C) KPIs of a 'coverage_test' for one or many 'lines' values at once
+            (see 'erlang.concurrency_kpis'). Nothing is simulated. RateProfile volumes are replaced by their mean
+            expected volume over the next 'intervals' intervals of the chain.
+        """
+        return concurrency_kpis(
+            self._expected_volumes(volumes, intervals), self.contact_types, self.interval, lines,
+            self.max_concurrency, service_time, self.concurrency_floor
+        )
+
+    def search_lines(
+        self,
+        volumes:dict,
+        service_time:float,
+        target:float,
+        max_lines:int=None,
+        window:int=2,
+        intervals:int=10,
+        replications:int=10,
+        seed:int=None,
+        workers:int=None
+    ) -> dict:
+        """
+            Usage: Find the minimum number of lines whose simulated service level reaches 'target'.
+            The analytic approximation is evaluated on the whole grid 1..max_lines to bracket the answer, then only
+            the candidates within 'window' lines of the analytic answer are simulated (with replications). The search
+            walks outwards from the window only if the simulated answer falls outside of it.
+            
+            Arguments:
+            -volumes: Volumes dictionary. Direct input for the 'simulate' method.
+            -service_time: Waiting time threshold for the service level.
+            -target: Service level to reach (e.g. 0.8).
+            -max_lines: Optional, upper bound of the grid. Defaults to twice the offered traffic at maximum concurrency.
+            -window: Lines simulated on each side of the analytic answer.
+            -intervals, replications, seed, workers: Direct inputs for the 'replicate_coverage_test' method. The same
+            seed is used for every candidate (common random numbers).
+
+            Returns: {'lines': minimum lines meeting the target (None if not found up to max_lines), 'analytic': KPI
+            arrays over the grid (plus 'lines'), 'simulated': {lines: replication summary}}
+        """
+        if seed is None:
+            seed = int(self.rng.integers(2**32))
+        max_lines = max_lines if max_lines else self._max_lines(self._expected_volumes(volumes, intervals))
+        grid = np.arange(1, max_lines + 1)
+        analytic = self.analytic_kpis(volumes, grid, service_time, intervals=intervals)
+        analytic['lines'] = grid
+        meets = analytic['service_level'] >= target
+        guess = int(grid[np.argmax(meets)]) if meets.any() else max_lines
+
+        simulated = dict()
+        def reaches(lines:int) -> bool:
+            if lines not in simulated:
+                simulated[lines] = self.replicate_coverage_test(
+                    volumes, lines, service_time, intervals=intervals, replications=replications, seed=seed, workers=workers
+                )['summary']
+            return simulated[lines]['service_level']['mean'] >= target
+
+        low, high = max(1, guess - window), min(max_lines, guess + window)
+        found = next((lines for lines in range(low, high + 1) if reaches(lines)), None)
+        if found is None:
+            found = next((lines for lines in range(high + 1, max_lines + 1) if reaches(lines)), None)
+        elif found == low:
+            while found > 1 and reaches(found - 1):
+                found -= 1
+        return {
+            'lines': found,
+            'analytic': analytic,
+            'simulated': dict(sorted(simulated.items()))
+        }
+
+    #STAFFING
+    def solve_staffing(
+        self,
+        volumes:list,
+        service_time:float,
+        target:float,
+        kpi:str='service_level',
+        max_lines:int=None
+    ) -> dict:
+        """
+            Usage: Find the minimum lines of every interval of a day so that the interval reaches 'target'.
+            Intervals are solved in order on a single chain: each interval starts from the carried state ('waiting',
+            'events', 'current', 'chain_position') left by the lines chosen for the previous one, which is saved once
+            and restored for every candidate. The generator state is restored too, so every candidate sees the same
+            arrivals and draws (common random numbers). The search starts from the analytic guess (see
+            'analytic_kpis'), gallops until the answer is bracketed and bisects, assuming the KPI is monotone in lines.
+            Candidates are judged on the contacts solved during the interval, contacts still waiting at its end that
+            already waited more than 'service_time' count as missing the service level. The asa of an interval that
+            handles none of its offered contacts is inf, intervals without offered contacts meet any target unless
+            contacts carried into them are still waiting undecided.
+            The simulation is reset first and is left at the end of the day with the chosen lines.
+            
+            Arguments:
+            -volumes: list of volumes dictionaries, one per interval. Direct inputs for the 'simulate' method.
+            -service_time: Waiting time threshold for the service level.
+            -target: Target value of 'kpi'.
+            -kpi: 'service_level' (reach at least 'target'), 'asa' or 'abandonment_rate' (at most 'target').
+            -max_lines: Optional, upper bound for the lines of any interval. Defaults to twice the offered traffic of
+            the interval at maximum concurrency, plus the contacts carried into it.
+
+            Returns: {'lines': list of lines per interval, 'kpis': list of the interval KPIs with those lines, 'met': list
+            of booleans (False where even 'max_lines' misses the target), 'evaluations': number of simulated candidates}
+        """
+        if kpi not in ('service_level', 'asa', 'abandonment_rate'):
+            print("ValErr: 'kpi' must be one of 'service_level', 'asa' or 'abandonment_rate'.")
+            return None
+        def meets(kpis:dict) -> bool:
+            # An interval without offered contacts (and no carried contact left undecided) meets any target,
+            # otherwise NaN KPIs fail it
+            if kpis.get('offered', 1) == 0 and not kpis.get('pending'):
+                return True
+            return bool(kpis[kpi] >= target) if kpi == 'service_level' else bool(kpis[kpi] <= target)
+
+        self.reset()
+        plan = {'lines': list(), 'kpis': list(), 'met': list(), 'evaluations': 0}
+        for interval_volumes in volumes:
+            state = self.snapshot()
+            # Carried contacts (in handling or waiting) need lines on top of the interval's own volume
+            upper = max_lines if max_lines else self._max_lines(self._expected_volumes(interval_volumes)) + self.current + len(self.waiting)
+            evaluated = dict()
+
+            def evaluate(lines:int) -> bool:
+                if lines not in evaluated:
+                    self.restore(state)
+                    self.kpi_accumulator = KpiAccumulator(service_time, interval=self.interval)
+                    self.simulate(interval_volumes, lines)
+                    evaluated[lines] = self._interval_kpis(service_time)
+                return meets(evaluated[lines])
+
+            analytic = self.analytic_kpis(interval_volumes, np.arange(upper + 1), service_time)
+            analytic_meets = [meets({kpi: value}) for value in analytic[kpi]]
+            guess = analytic_meets.index(True) if True in analytic_meets else upper
+
+            #Gallop from the guess until [failing, meeting] is bracketed (0 lines is treated as failing)
+            step = 1
+            if evaluate(guess):
+                low, high = max(guess - step, 0), guess
+                while low > 0 and evaluate(low):
+                    high, step = low, step * 2
+                    low = max(high - step, 0)
+                if low == 0 and evaluate(0):
+                    high = 0
+            else:
+                low, high = guess, min(guess + step, upper)
+                while high > low and not evaluate(high):
+                    low, step = high, step * 2
+                    high = min(low + step, upper)
+            #Bisect
+            while high - low > 1:
+                middle = (low + high) // 2
+                if evaluate(middle):
+                    high = middle
+                else:
+                    low = middle
+
+            #Commit the chosen lines on the main chain (same draws as the evaluated candidate)
+            self.restore(state)
+            self.simulate(interval_volumes, high)
+            plan['lines'].append(high)
+            plan['kpis'].append(evaluated[high])
+            plan['met'].append(meets(evaluated[high]))
+            plan['evaluations'] += len(evaluated)
+        return plan
+
+    def _interval_kpis(self, service_time:float) -> dict:
+        # KPIs of a fresh 'kpi_accumulator' after one interval. Contacts still waiting count as offered once their
+        # outcome is known: they already missed 'service_time', or their patience / auto-solve time ran out. The
+        # others are 'pending'
+        accumulator = self.kpi_accumulator
+        interval_end = self.chain_position * self.interval
+        decided, abandoned = 0, accumulator.abandoned
+        for c in self.waiting:
+            waited = interval_end - c.arrival
+            decided += waited > min(service_time, c.patience, c.auto_solve_time)
+            abandoned += c.patience < waited and c.patience <= c.auto_solve_time
+        offered = accumulator.offered + decided
+        return {
+            'service_level': accumulator.answered_within(service_time) / offered if offered else float('nan'),
+            'abandonment_rate': abandoned / offered if offered else 0.0,
+            'asa': accumulator.waiting.mean if accumulator.handled else (np.inf if offered else float('nan')),
+            'offered': offered,
+            'pending': len(self.waiting) - decided
+        }
+
+    def _expected_volumes(self, volumes:dict, intervals:int=1) -> dict:
+        # Contacts per interval of every contact type: RateProfiles give their mean expected arrivals over the next
+        # 'intervals' intervals of the chain (L(end) - L(start), as drawn by 'simulate')
+        start = self.chain_position * self.interval
+        return {
+            ct: float(volume.cumulative(start + intervals * self.interval) - volume.cumulative(start)) / intervals
+            if isinstance(volume, RateProfile) else volume
+            for ct, volume in volumes.items()
+        }
+
+    def _max_lines(self, volumes:dict) -> int:
+        # Twice the offered traffic at maximum concurrency
+        peak_aht = max(
+            ct['aht'][0] + ct['aht'][1] * max(self.max_concurrency, self.concurrency_floor)
+            for ct in self.contact_types.values()
+        )
+        return int(np.ceil(2 * sum(volumes.values()) * peak_aht / self.interval)) + 10
+
+    #CACHE
+    def _cached_run(self, name:str, inputs:tuple, run:functools.partial):
+        # Tests that leave this simulation in a new state are cached with that state and the outputs, keyed on the
+        # inputs, the setup and the generator state they start from (so seeded runs hit). Unseeded runs bypass the cache
+        if self.cache is None or not self._seeded:
+            return run()
+        key = fingerprint(
+            name, inputs, self._config(), self.rng.bit_generator.state,
+            self.compact, self.keep_records, self.service_time
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.handled, self.missed = _StateUnpickler(io.BytesIO(cached['outputs']), self.rng).load()
+            self.restore(cached['snapshot'])
+            self.warmup_intervals = cached['warmup_intervals']
+            return cached['value']
+        value = run()
+        buffer = io.BytesIO()
+        _StatePickler(buffer, self.rng).dump((self.handled, self.missed))
+        self.cache.put(key, {
+            'value': value,
+            'snapshot': self.snapshot(),
+            'outputs': buffer.getvalue(),
+            'warmup_intervals': self.warmup_intervals
+        })
+        return value
+
+    #STATE
+    def snapshot(self) -> dict:
+        """
+            Usage: Checkpoint of the carried state ('waiting', 'events', 'current', 'chain_position', accumulators)
+            and of the generator state. The waiting contacts, calendar and KPI accumulator are serialised into a
+            compact pickle where the simulation's generator is stored by reference, so a snapshot can be restored
+            any number of times, on this simulation or on a copy of it in another process (see 'fork').
+            Handled/missed outputs are append-only: only their lengths are recorded and 'restore' truncates them.
+        """
+        buffer = io.BytesIO()
+        _StatePickler(buffer, self.rng).dump((self.waiting, self.events, self.kpi_accumulator))
+        return {
+            'rng': copy.deepcopy(self.rng.bit_generator.state),
+            'carry': buffer.getvalue(),
+            'current': self.current,
+            'chain_position': self.chain_position,
+            'lines_acc': list(self.lines_acc),
+            'busy_acc': list(self.busy_acc),
+            'handling_time_acc': self.handling_time_acc,
+            'contacts_created': self.contacts_created,
+            'handled': len(self.handled),
+            'missed': len(self.missed)
+        }
+
+    def restore(self, snapshot:dict) -> None:
+        """
+            Usage: Return to the state of 'snapshot' (see 'snapshot'). The next 'simulate' call draws the same random
+            numbers it would have drawn when the snapshot was taken.
+        """
+        if self.rng.bit_generator.state['bit_generator'] != snapshot['rng']['bit_generator']:
+            # Injected generators (see __init__) may use another bit generator than the default PCG64
+            self.rng = _generator_like(snapshot['rng'])
+        self.waiting, self.events, self.kpi_accumulator = _StateUnpickler(io.BytesIO(snapshot['carry']), self.rng).load()
+        self.rng.bit_generator.state = snapshot['rng']
+        self.current = snapshot['current']
+        self.chain_position = snapshot['chain_position']
+        self.lines_acc = list(snapshot['lines_acc'])
+        self.busy_acc = list(snapshot['busy_acc'])
+        self.handling_time_acc = snapshot['handling_time_acc']
+        self.contacts_created = snapshot['contacts_created']
+        for output, length in ((self.handled, snapshot['handled']), (self.missed, snapshot['missed'])):
+            if isinstance(output, list):
+                del output[length:]
+            else:
+                output.truncate(length)
+        self._results = None
+
+    def fork(self, branches:list, service_time:float, workers:int=None) -> list:
+        """
+            Usage: Run several what-if continuations of the current state (e.g. a warmed-up 'coverage_test') across
+            a process pool, without re-simulating the warm-up. Every branch starts from the same snapshot, including
+            the generator state, so branches share their random numbers (common random numbers). This instance is
+            not modified.
+            
+            Arguments:
+            -branches: list of dictionaries with 'volumes' and 'lines' (direct inputs for the 'simulate' method) and
+            optionally 'intervals' (defaults to 1).
+            -service_time: Direct input for the 'get_kpis' method.
+            -workers: Optional, number of worker processes. Defaults to the number of cores, 1 runs in-process.
+
+            Returns: list of 'get_kpis' dictionaries, one per branch, covering only the branch's intervals.
+        """
+        runner = functools.partial(_fork_branch, self._config(), self.snapshot(), service_time)
+        workers = min(workers if workers else os.cpu_count() or 1, len(branches))
+        if workers <= 1:
+            return [runner(branch) for branch in branches]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(runner, branches))
+
+    def _config(self) -> dict:
+        return {
+            'interval': self.interval,
+            'max_concurrency': self.max_concurrency,
+            'concurrency_floor': self.concurrency_floor,
+            'contact_types': self.contact_types
+        }
+
     #COVERAGE TRANSFORMERS
     @staticmethod
     def scale_transform(coverage:np.ndarray, scale_factor:float, unit:float=1) -> np.ndarray:
@@ -244,12 +954,12 @@ class Simulation:
             -smooth_factor: Main parameter for the smoothing algorythm. Positive Integer.
             -unit: Minimum unit size for the differences applied. Will be used for rounding purposes
         """
-        if smooth_factor <= 0:
+        if np.any(np.asarray(smooth_factor) <= 0):
             print("ValErr: Argument 'smooth_factor' must be a positive integer.")
             return
         else:
-            
-            diffs = np.array([0, * np.diff(coverage)])
+            # Differences along the last axis, so 2D coverages (one plan per row) are transformed row by row
+            diffs = np.diff(coverage, axis=-1, prepend=np.take(coverage, [0], axis=-1))
             return np.round((coverage - diffs / smooth_factor)/unit) * unit
         
     @staticmethod
@@ -264,4 +974,104 @@ class Simulation:
             The effect will be proportionally regulated by 'power' and finally rounded to the 'unit'.
         """
         
-        return coverage - np.round(power * np.log(coverage / threshold) / unit) * unit
\ No newline at end of file
+        return coverage - np.round(power * np.log(coverage / threshold) / unit) * unit
+
+def _coverage_test_replication(config:dict, volumes:dict, lines:int, intervals:int, service_time:float, seed) -> dict:
+    # Module level so that it can be pickled to worker processes
+    sim = Simulation(
+        interval = config['interval'],
+        max_concurrency = config['max_concurrency'],
+        concurrency_floor = config['concurrency_floor'],
+        seed = seed
+    )
+    sim.contact_types = dict(config['contact_types'])
+    sim.coverage_test(volumes, lines, intervals)
+    return sim.get_kpis(service_time)
+
+def _day_plan_run(config:dict, volumes:dict, service_time:float, drain_intervals:int, seed, coverage:np.ndarray) -> dict:
+    # Module level so that it can be pickled to worker processes
+    sim = Simulation(
+        interval = config['interval'],
+        max_concurrency = config['max_concurrency'],
+        concurrency_floor = config['concurrency_floor'],
+        seed = seed,
+        service_time = service_time,
+        keep_records = False
+    )
+    sim.contact_types = dict(config['contact_types'])
+    coverage = np.asarray(coverage, dtype=np.int64)
+    intervals = len(coverage)
+    # Fractional volumes are rounded up or down at random (expected value kept), drawn first from the plan's seeded
+    # generator so every plan gets the same volumes. RateProfiles are passed through to 'simulate'
+    volumes = {ct: values if isinstance(values, RateProfile) else _random_round(values, sim.rng) for ct, values in volumes.items()}
+    for i in range(intervals):
+        sim.simulate({ct: values if isinstance(values, RateProfile) else values[i] for ct, values in volumes.items()}, int(coverage[i]))
+    for _ in range(drain_intervals if intervals else 0):
+        sim.simulate({ct: 0 for ct in volumes}, int(coverage[-1]))
+
+    breakdown = sim.kpi_accumulator.interval_kpis()
+    per_interval = lambda name: np.pad(breakdown[name][:intervals], (0, max(intervals - len(breakdown[name]), 0)))
+    offered, handled = per_interval('offered'), per_interval('handled')
+    lines = coverage.astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        plan = {
+            'lines': lines,
+            'offered': offered,
+            'handled': handled,
+            'service_level': per_interval('answered') / offered,
+            'abandonment_rate': per_interval('abandoned') / offered,
+            'asa': per_interval('waiting_time') / handled,
+            'occupancy': np.asarray(sim.busy_acc[:intervals]) / (lines * sim.interval)
+        }
+    plan['totals'] = sim.get_kpis(service_time)
+    plan['agent_time'] = float(lines.sum() * sim.interval / sim.max_concurrency)
+    return plan
+
+def _random_round(values:np.ndarray, rng:np.random.Generator) -> list:
+    # Integer volumes, fractional ones rounded up with probability equal to their fractional part
+    values = np.maximum(np.asarray(values, dtype=float), 0)
+    counts = np.floor(values)
+    if np.any(counts != values):
+        counts += rng.random(values.shape) < values - counts
+    return counts.astype(np.int64).tolist()
+
+def _fork_branch(config:dict, snapshot:dict, service_time:float, branch:dict) -> dict:
+    # Module level so that it can be pickled to worker processes
+    sim = Simulation(
+        interval = config['interval'],
+        max_concurrency = config['max_concurrency'],
+        concurrency_floor = config['concurrency_floor'],
+        seed = _generator_like(snapshot['rng'])
+    )
+    sim.contact_types = dict(config['contact_types'])
+    sim.restore(snapshot)
+    # Only the branch's own intervals are measured
+    sim.kpi_accumulator = KpiAccumulator(sim.service_time, interval=sim.interval)
+    sim.lines_acc = list()
+    sim.busy_acc = list()
+    sim.handling_time_acc = 0
+    for _ in range(branch.get('intervals', 1)):
+        sim.simulate(branch['volumes'], branch['lines'])
+    return sim.get_kpis(service_time)
+
+def _generator_like(state:dict) -> np.random.Generator:
+    # Generator with the bit generator type of 'state' (e.g. PCG64 or Philox), its state is set by the caller
+    return np.random.Generator(getattr(np.random, state['bit_generator'])())
+
+class _StatePickler(pickle.Pickler):
+    # Stores the simulation's generator by reference (its state is saved separately)
+    def __init__(self, file, rng:np.random.Generator):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.rng = rng
+
+    def persistent_id(self, obj):
+        return 'rng' if obj is self.rng else None
+
+class _StateUnpickler(pickle.Unpickler):
+    # Rebinds generator references to the restoring simulation's generator
+    def __init__(self, file, rng:np.random.Generator):
+        super().__init__(file)
+        self.rng = rng
+
+    def persistent_load(self, pid):
+        return self.rng
@@ -4,6 +4,6 @@ setup(
     name='support-contact-simulations',
     version='1.0.0',
     description='Support Contact Simulations',
-    packages=['concurrency_simulator','agent_simulator'],
+    packages=['concurrency_simulator','agent_simulator','simulation_tools'],
     install_requires=['numpy'],
 )
\ No newline at end of file
@@ -0,0 +1,9 @@
+from .replications import run_replications, summarise
+from .contact_store import ContactStore
+from .kpis import KpiAccumulator, RunningStats
+from .steady_state import mser, steady_state
+from .cache import ResultCache, fingerprint
+from .profiling import Profiler
+from .arrivals import RateProfile, poisson_arrivals, profile_arrivals
+
+__all__ = ['run_replications', 'summarise', 'ContactStore', 'KpiAccumulator', 'RunningStats', 'mser', 'steady_state', 'ResultCache', 'fingerprint', 'Profiler', 'RateProfile', 'poisson_arrivals', 'profile_arrivals']
\ No newline at end of file
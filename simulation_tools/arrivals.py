@@ -0,0 +1,141 @@
+import numpy as np
+
+class RateProfile:
+    """
+        Usage: Piecewise-linear arrival rate profile (contacts per time unit) for non-homogeneous Poisson arrivals.
+        The rate is linearly interpolated between the knots (times[i], rates[i]). Repeated knot times make steps
+        (see 'from_volumes'). If 'period' is set the profile repeats every 'period' (e.g. an intraday profile over a
+        year of days), otherwise the rate is 0 outside [times[0], times[-1]].
+
+        The cumulative rate L(t) is quadratic within every segment, so it is inverted in closed form (see 'inverse').
+
+        Arguments:
+        -times: non-decreasing knot times (within [0, period] if 'period' is set).
+        -rates: non-negative rates at the knots.
+        -period: Optional, length of the repeated cycle.
+    """
+    def __init__(self, times:list, rates:list, period:float=None):
+        times = np.asarray(times, dtype=float)
+        rates = np.asarray(rates, dtype=float)
+        if times.ndim != 1 or times.shape != rates.shape or len(times) < 2:
+            raise ValueError("RateProfile | 'times' and 'rates' must be 1D arrays of the same length (at least 2 knots).")
+        if np.any(np.diff(times) < 0) or np.any(rates < 0):
+            raise ValueError("RateProfile | 'times' must be non-decreasing and 'rates' non-negative.")
+        if period is not None and (times[0] < 0 or times[-1] > period):
+            raise ValueError("RateProfile | 'times' must be within [0, period].")
+        self.times = times
+        self.rates = rates
+        self.period = period
+        widths = np.diff(times)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._slopes = np.where(widths > 0, np.diff(rates) / widths, 0.0)
+        self._cumulative = np.concatenate([[0.0], np.cumsum(widths * (rates[:-1] + rates[1:]) / 2)])
+
+    @classmethod
+    def from_volumes(cls, volumes:list, interval:float, smooth:bool=False, period:float=None) -> "RateProfile":
+        """
+            Usage: Profile of per-interval volumes.
+            -smooth=False: constant rate volume / interval within every interval (expected volumes kept exactly).
+            -smooth=True: rates interpolated between the interval midpoints (and held flat before the first and
+            after the last midpoint), so the expected volume of an interval is only approximately its volume.
+        """
+        rates = np.asarray(volumes, dtype=float) / interval
+        edges = np.arange(len(rates) + 1) * interval
+        if smooth:
+            times = np.concatenate([[0.0], edges[:-1] + interval / 2, [edges[-1]]])
+            return cls(times, np.concatenate([rates[:1], rates, rates[-1:]]), period=period)
+        return cls(np.repeat(edges, 2)[1:-1], np.repeat(rates, 2), period=period)
+
+    @property
+    def total(self) -> float:
+        # Expected arrivals over one period (or over the whole profile)
+        return float(self._cumulative[-1])
+
+    def rate(self, t) -> np.ndarray:
+        t = self._fold(np.asarray(t, dtype=float))[1]
+        rate = np.interp(t, self.times, self.rates)
+        return np.where((t < self.times[0]) | (t > self.times[-1]), 0.0, rate)
+
+    def cumulative(self, t) -> np.ndarray:
+        """
+            Usage: Expected arrivals L(t) from time 0 to 't' (vectorised).
+        """
+        cycles, t = self._fold(np.asarray(t, dtype=float))
+        idx = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, len(self.times) - 2)
+        dt = np.clip(t, self.times[0], self.times[-1]) - self.times[idx]
+        within = self._cumulative[idx] + self.rates[idx] * dt + self._slopes[idx] * dt**2 / 2
+        return cycles * self.total + within
+
+    def inverse(self, y) -> np.ndarray:
+        """
+            Usage: Time t such that L(t) = 'y' (vectorised). Within a segment, L(t) - L(t_i) = r_i dt + s_i dt^2 / 2
+            is solved as dt = 2 dy / (r_i + sqrt(r_i^2 + 2 s_i dy)), which is stable for flat and zero rate segments.
+        """
+        y = np.asarray(y, dtype=float)
+        cycles = np.floor(y / self.total) if self.period is not None else np.zeros(y.shape)
+        y = np.minimum(y - cycles * self.total, self.total)
+        idx = np.clip(np.searchsorted(self._cumulative, y, side='right') - 1, 0, len(self.times) - 2)
+        dy = y - self._cumulative[idx]
+        rates, slopes = self.rates[idx], self._slopes[idx]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dt = np.nan_to_num(2 * dy / (rates + np.sqrt(np.maximum(rates**2 + 2 * slopes * dy, 0))))
+        t = np.minimum(self.times[idx] + dt, self.times[idx + 1])
+        return t + (cycles * self.period if self.period is not None else 0)
+
+    def _inverse_sorted(self, y:np.ndarray) -> np.ndarray:
+        # 'inverse' of non-decreasing values within the profile: segments are located by searching the (few) segment
+        # starts among the values instead of every value among the segment starts
+        if self.period is not None:
+            cycles = np.arange(np.floor(y[0] / self.total), np.floor(y[-1] / self.total) + 1)
+        else:
+            cycles = np.zeros(1)
+        start_y = (cycles[:, None] * self.total + self._cumulative[None, :-1]).ravel()
+        start_t = (cycles[:, None] * (self.period or 0) + self.times[None, :-1]).ravel()
+        end_t = start_t + np.tile(np.diff(self.times), len(cycles))
+        bounds = np.searchsorted(y, start_y, side='left')
+        bounds[0] = 0
+        seg = np.repeat(np.arange(len(start_y)), np.diff(np.append(bounds, len(y))))
+        dy = y - start_y[seg]
+        rates, slopes = np.tile(self.rates[:-1], len(cycles))[seg], np.tile(self._slopes, len(cycles))[seg]
+        denominator = rates + np.sqrt(np.maximum(rates**2 + 2 * slopes * dy, 0))
+        dt = np.divide(2 * dy, denominator, out=np.zeros(len(y)), where=denominator > 0)
+        return np.minimum(start_t[seg] + dt, end_t[seg])
+
+    def _fold(self, t:np.ndarray) -> tuple:
+        # (completed cycles, time within the cycle)
+        if self.period is None:
+            return np.zeros(t.shape), t
+        cycles = np.floor(t / self.period)
+        return cycles, t - cycles * self.period
+
+    def __repr__(self):
+        return f"RateProfile(knots={len(self.times)},total={self.total:.2f},period={self.period})"
+
+def poisson_arrivals(profile:RateProfile, start:float, end:float, rng:np.random.Generator=None, count:int=None) -> np.ndarray:
+    """
+        Usage: Sorted arrival times of a non-homogeneous Poisson process with rate 'profile' over [start, end), by
+        time inversion: the arrivals are L^-1 of the arrivals of a unit rate process over [L(start), L(end)).
+        Fully vectorised, no thinning (no rejected candidates).
+
+        Arguments:
+        -profile: RateProfile.
+        -start, end: time window.
+        -rng: numpy Generator.
+        -count: Optional, number of arrivals (the process conditioned on its count). Poisson distributed otherwise.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    low, high = profile.cumulative(start), profile.cumulative(end)
+    if count is None:
+        count = rng.poisson(max(high - low, 0))
+    if count == 0 or high <= low:
+        return np.empty(0)
+    # Normalised exponential spacings: sorted uniforms on [low, high) without sorting
+    spacings = np.cumsum(rng.exponential(size=count + 1))
+    return np.minimum(profile._inverse_sorted(low + (high - low) * spacings[:-1] / spacings[-1]), np.nextafter(end, start))
+
+def profile_arrivals(profiles:dict, start:float, end:float, rng:np.random.Generator=None) -> dict:
+    """
+        Usage: 'poisson_arrivals' of every contact type of a {contact_type: RateProfile} dictionary.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    return {ct: poisson_arrivals(profile, start, end, rng) for ct, profile in profiles.items()}
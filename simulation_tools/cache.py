@@ -0,0 +1,129 @@
+import os, json, pickle, hashlib, tempfile
+import numpy as np
+from typing import Callable
+
+from .arrivals import RateProfile
+
+def fingerprint(*parts) -> str:
+    """
+        Usage: Canonical SHA-256 hash of JSON-like inputs (dicts, lists, tuples, scalars, NumPy arrays and scalars,
+        RateProfiles).
+        Dictionary keys are sorted and arrays are hashed with their dtype and shape, so equal inputs always produce
+        the same key whatever their construction order.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=_canonical).encode()).hexdigest()
+
+def _canonical(obj):
+    if isinstance(obj, np.ndarray):
+        return {'dtype': obj.dtype.str, 'shape': obj.shape, 'data': hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest()}
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, RateProfile):
+        return {'times': obj.times, 'rates': obj.rates, 'period': obj.period}
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    raise TypeError(f"fingerprint | Can't hash objects of type {type(obj).__name__}.")
+
+class ResultCache:
+    """
+        Usage: On-disk, content-addressed cache of simulation results. Values are pickled into
+        'directory/<key[:2]>/<key>.pkl' (key: see 'fingerprint'), written atomically, so several processes can share
+        a cache directory. Reads refresh the file's modification time, which is used for least-recently-used
+        eviction whenever the cache grows over 'max_bytes' or 'max_entries'.
+
+        Arguments:
+        -directory: cache directory (created if missing).
+        -max_bytes: Optional, maximum total size of the cached files.
+        -max_entries: Optional, maximum number of cached results.
+    """
+    def __init__(self, directory:str, max_bytes:int=None, max_entries:int=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key:str, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass # Evicted by another process after the read
+        self.hits += 1
+        return value
+
+    def put(self, key:str, value) -> "ResultCache":
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+        return self
+
+    def get_or_compute(self, key:str, compute:Callable):
+        """
+            Usage: Cached value of 'key', or the result of 'compute()' (stored before being returned).
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self) -> int:
+        """
+            Usage: Remove least recently used entries until the cache fits 'max_bytes' and 'max_entries'.
+            Returns the number of removed entries.
+        """
+        if self.max_bytes is None and self.max_entries is None:
+            return 0
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for path, _, size in entries:
+            if (self.max_bytes is None or total <= self.max_bytes) and (self.max_entries is None or len(entries) - removed <= self.max_entries):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path, _, _ in self._entries():
+            os.remove(path)
+
+    def _entries(self) -> list:
+        # (path, last access, size) of every cached result
+        entries = list()
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.pkl'):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _path(self, key:str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.pkl')
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def __repr__(self):
+        return f"ResultCache(directory={self.directory},hits={self.hits},misses={self.misses})"
+
+_MISSING = object()
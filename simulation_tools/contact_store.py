@@ -0,0 +1,123 @@
+import math
+import numpy as np
+from typing import Callable
+
+_DTYPES = {
+    'float': np.float64,
+    'int': np.int64,
+    'category': np.int32
+}
+
+class ContactStore:
+    """
+        Usage: Append-only columnar store for completed contacts, a compact alternative to a list of contact
+        objects. Rows are written into fixed size NumPy structured array chunks. String fields are interned
+        ('category' kind) and stored as integer codes.
+
+        Arguments:
+        -fields: list of (name, kind) tuples, kind in 'float', 'int' or 'category'. None is stored as NaN for
+        'float' fields and as -1 for 'int' fields, and restored as None by 'to_dicts'.
+        -row: callable mapping an appended item (e.g. a Contact) to a tuple of values in 'fields' order.
+        -chunk_size: rows per chunk.
+    """
+    def __init__(self, fields:list, row:Callable, chunk_size:int=4096):
+        self.fields = list(fields)
+        self.dtype = np.dtype([(name, _DTYPES[kind]) for name, kind in self.fields])
+        self.row = row
+        self.chunk_size = chunk_size
+        self.categories = {name: list() for name, kind in self.fields if kind == 'category'}
+        self._codes = {name: dict() for name in self.categories}
+        self._category_fields = [(pos, name) for pos, (name, kind) in enumerate(self.fields) if kind == 'category']
+        self._float_fields = [pos for pos, (_, kind) in enumerate(self.fields) if kind == 'float']
+        self._int_fields = [pos for pos, (_, kind) in enumerate(self.fields) if kind == 'int']
+        self._chunks = list()
+        self._chunk = np.empty(chunk_size, dtype=self.dtype)
+        self._fill = 0
+        self._array = None
+
+    def append(self, item:object) -> "ContactStore":
+        values = list(self.row(item))
+        for pos, name in self._category_fields:
+            codes = self._codes[name]
+            code = codes.get(values[pos])
+            if code is None:
+                code = codes[values[pos]] = len(codes)
+                self.categories[name].append(values[pos])
+            values[pos] = code
+        for pos in self._float_fields:
+            if values[pos] is None:
+                values[pos] = math.nan
+        for pos in self._int_fields:
+            if values[pos] is None:
+                values[pos] = -1
+        self._chunk[self._fill] = tuple(values)
+        self._fill += 1
+        if self._fill == self.chunk_size:
+            self._chunks.append(self._chunk)
+            self._chunk = np.empty(self.chunk_size, dtype=self.dtype)
+            self._fill = 0
+        self._array = None
+        return self
+
+    def extend(self, items:list) -> "ContactStore":
+        for item in items:
+            self.append(item)
+        return self
+
+    def truncate(self, length:int) -> "ContactStore":
+        """
+            Usage: Drop every row after the first 'length' (e.g. to roll back to a saved simulation state).
+        """
+        if length >= len(self):
+            return self
+        full, fill = divmod(length, self.chunk_size)
+        if full < len(self._chunks):
+            self._chunk = self._chunks[full].copy()
+            self._chunks = self._chunks[:full]
+        self._fill = fill
+        self._array = None
+        return self
+
+    def to_array(self) -> np.ndarray:
+        """
+            Usage: All rows as a single structured array (category fields hold codes). Cached until the next append.
+        """
+        if self._array is None:
+            self._array = np.concatenate([*self._chunks, self._chunk[:self._fill]])
+        return self._array
+
+    def column(self, name:str) -> np.ndarray:
+        """
+            Usage: One field as an array. Category fields are decoded to an object array of their original values.
+        """
+        values = self.to_array()[name]
+        if name in self.categories:
+            return np.array(self.categories[name], dtype=object)[values]
+        return values
+
+    def to_dicts(self) -> list:
+        names = [name for name, _ in self.fields]
+        decoders = {name: self.categories[name] for name in self.categories}
+        ints = {self.fields[pos][0] for pos in self._int_fields}
+        dicts = list()
+        for values in self.to_array().tolist():
+            record = dict(zip(names, values))
+            for name, value in record.items():
+                if name in decoders:
+                    record[name] = decoders[name][value]
+                elif name in ints:
+                    record[name] = None if value == -1 else value
+                elif value != value:
+                    record[name] = None
+            dicts.append(record)
+        return dicts
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self._chunks) + 1) * self.chunk_size * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return len(self._chunks) * self.chunk_size + self._fill
+
+    def __repr__(self):
+        return f"ContactStore(length={len(self)},fields={len(self.fields)})"
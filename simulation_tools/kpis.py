@@ -0,0 +1,182 @@
+import math
+import numpy as np
+
+class RunningStats:
+    """
+        Usage: Online count, mean and variance (Welford's algorithm).
+    """
+    __slots__ = ('count', 'mean', 'm2', 'total')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+
+    def add(self, value:float) -> None:
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count > 1 else float('nan')
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count},mean={self.mean},std={self.std})"
+
+class KpiAccumulator:
+    """
+        Usage: Streaming KPI accumulator, updated once per solved contact so that KPIs do not require keeping
+        every contact in memory.
+
+        Keeps counts (offered, handled, answered within 'service_time', abandoned, auto-solved), Welford
+        statistics of waiting and handling times, a fixed-bucket waiting time histogram of handled contacts and
+        a per-interval breakdown (by arrival interval) of the same counts and waiting time sums.
+
+        Arguments:
+        -service_time: Optional, waiting time threshold for the service level. If ommitted, the service level is
+        estimated from the histogram.
+        -interval: Optional, interval length for the per-interval breakdown. If ommitted, no breakdown is kept.
+        -bucket_width: width of the waiting time histogram buckets.
+        -buckets: number of histogram buckets, waiting times beyond buckets x bucket_width go to an overflow bucket.
+    """
+    INTERVAL_COUNTERS = ('offered', 'handled', 'answered', 'abandoned', 'auto_solved', 'waiting_time', 'handling_time')
+
+    def __init__(self, service_time:float=None, interval:float=None, bucket_width:float=1.0, buckets:int=600):
+        self.service_time = service_time
+        self.interval = interval
+        self.bucket_width = bucket_width
+        self.histogram = np.zeros(buckets + 1, dtype=np.int64)
+        self.waiting = RunningStats()
+        self.handling = RunningStats()
+        self.handled = 0
+        self.answered = 0
+        self.abandoned = 0
+        self.auto_solved = 0
+        self._intervals = {name: list() for name in self.INTERVAL_COUNTERS}
+
+    def add_handled(self, arrival:float, waiting_time:float, handling_time:float) -> None:
+        self.handled += 1
+        self.waiting.add(waiting_time)
+        self.handling.add(handling_time)
+        answered = self.service_time is not None and waiting_time <= self.service_time
+        self.answered += answered
+        self.histogram[min(int(waiting_time / self.bucket_width), len(self.histogram) - 1)] += 1
+        if self.interval:
+            idx = self._interval_index(arrival)
+            counters = self._intervals
+            counters['offered'][idx] += 1
+            counters['handled'][idx] += 1
+            counters['answered'][idx] += answered
+            counters['waiting_time'][idx] += waiting_time
+            counters['handling_time'][idx] += handling_time
+
+    def add_missed(self, arrival:float, status:str) -> None:
+        if status == 'abandoned':
+            self.abandoned += 1
+        else:
+            self.auto_solved += 1
+        if self.interval:
+            idx = self._interval_index(arrival)
+            self._intervals['offered'][idx] += 1
+            self._intervals['abandoned' if status == 'abandoned' else 'auto_solved'][idx] += 1
+
+    def _interval_index(self, arrival:float) -> int:
+        idx = int(arrival // self.interval)
+        if idx >= len(self._intervals['offered']):
+            for counter in self._intervals.values():
+                counter.extend([0] * (idx + 1 - len(counter)))
+        return idx
+
+    #RESULTS
+    @property
+    def offered(self) -> int:
+        return self.handled + self.abandoned + self.auto_solved
+
+    def answered_within(self, service_time:float=None) -> float:
+        """
+            Usage: Handled contacts that waited 'service_time' or less. Exact for the accumulator's own 'service_time',
+            otherwise interpolated from the waiting time histogram.
+        """
+        service_time = self.service_time if service_time is None else service_time
+        if service_time is None:
+            return float('nan')
+        if service_time == self.service_time:
+            return self.answered
+        full_buckets = int(service_time / self.bucket_width)
+        counts = self.histogram[:-1]
+        answered = counts[:full_buckets].sum()
+        if full_buckets < len(counts):
+            answered += counts[full_buckets] * (service_time / self.bucket_width - full_buckets)
+        return float(answered)
+
+    def kpis(self, service_time:float=None) -> dict:
+        offered = self.offered
+        return {
+            'offered': offered,
+            'handled': self.handled,
+            'service_level': self.answered_within(service_time) / offered if offered else float('nan'),
+            'abandonment_rate': self.abandoned / offered if offered else float('nan'),
+            'auto_solve_rate': self.auto_solved / offered if offered else float('nan'),
+            'asa': self.waiting.mean if self.handled else float('nan'),
+            'waiting_std': self.waiting.std,
+            'aht': self.handling.mean if self.handled else float('nan'),
+            'handling_std': self.handling.std
+        }
+
+    def interval_kpis(self) -> dict:
+        """
+            Usage: Per-interval breakdown as NumPy arrays (one position per arrival interval): the raw counters plus
+            'service_level', 'abandonment_rate' and 'asa'.
+        """
+        breakdown = {name: np.array(values, dtype=float) for name, values in self._intervals.items()}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            breakdown['service_level'] = breakdown['answered'] / breakdown['offered']
+            breakdown['abandonment_rate'] = breakdown['abandoned'] / breakdown['offered']
+            breakdown['asa'] = breakdown['waiting_time'] / breakdown['handled']
+        return breakdown
+
+    def waiting_quantile(self, q:float) -> float:
+        """
+            Usage: Waiting time quantile of handled contacts from the histogram (bucket upper edge).
+        """
+        if self.handled == 0:
+            return float('nan')
+        idx = int(np.searchsorted(np.cumsum(self.histogram), q * self.handled))
+        return (idx + 1) * self.bucket_width if idx < len(self.histogram) - 1 else float('inf')
+
+    def __repr__(self):
+        return f"KpiAccumulator(offered={self.offered},handled={self.handled})"
+
+class DiscardedRecords:
+    """
+        Usage: Stand-in for the handled/missed record collections when per-contact records are dropped.
+        Only counts appended items.
+    """
+    def __init__(self):
+        self._length = 0
+
+    def append(self, item:object) -> None:
+        self._length += 1
+
+    def truncate(self, length:int) -> "DiscardedRecords":
+        self._length = min(self._length, length)
+        return self
+
+    def to_dicts(self) -> list:
+        return list()
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self):
+        return f"DiscardedRecords(length={self._length})"
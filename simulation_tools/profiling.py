@@ -0,0 +1,86 @@
+import time
+import numpy as np
+from typing import Callable
+
+class Profiler:
+    """
+        Usage: Opt-in instrumentation of a simulation instance. 'wrap' replaces a method on one object (not on its
+        class) by a timing wrapper, and 'detach' removes the wrappers again, so uninstrumented simulations run the
+        original code paths with no overhead at all.
+
+        Collects:
+        -timers: calls and cumulative (inclusive) wall time per wrapped method.
+        -samples: queue lengths over simulated time, taken by a 'before' hook every 'sample_every' calls.
+
+        Arguments:
+        -sample_every: take one queue length sample every 'sample_every' hooked calls.
+    """
+    def __init__(self, sample_every:int=1):
+        self.sample_every = sample_every
+        self.timers = dict() # label -> [calls, seconds]
+        self.samples = list() # (time, {queue: length})
+        self._wrapped = list()
+        self._hooked_calls = 0
+
+    def wrap(self, obj:object, name:str, label:str=None, before:Callable=None) -> "Profiler":
+        """
+            Usage: Time every call of 'obj.name' under 'label' (defaults to 'name'). 'before', if given, is called
+            with the same arguments before the timed call (e.g. to sample queue lengths).
+        """
+        method = getattr(obj, name)
+        timer = self.timers.setdefault(label or name, [0, 0.0])
+        clock = time.perf_counter
+        def timed(*args, **kwargs):
+            if before is not None:
+                before(*args, **kwargs)
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timer[0] += 1
+                timer[1] += clock() - start
+        self._wrapped.append((obj, name, obj.__dict__.get(name)))
+        setattr(obj, name, timed)
+        return self
+
+    def sampler(self, lengths:Callable) -> Callable:
+        """
+            Usage: 'before' hook recording lengths(*args, **kwargs) -> (time, {queue: length}) every 'sample_every'
+            calls. 'lengths' gets the hooked method's arguments.
+        """
+        def sample(*args, **kwargs):
+            self._hooked_calls += 1
+            if self._hooked_calls % self.sample_every == 0:
+                self.samples.append(lengths(*args, **kwargs))
+        return sample
+
+    def detach(self) -> "Profiler":
+        for obj, name, original in reversed(self._wrapped):
+            if original is None:
+                obj.__dict__.pop(name, None)
+            else:
+                setattr(obj, name, original)
+        self._wrapped = list()
+        return self
+
+    def report(self) -> dict:
+        """
+            Returns: {'timers': {label: {'calls', 'seconds', 'mean'}}, 'queues': {'time': array, queue: array}}
+        """
+        timers = {
+            label: {'calls': calls, 'seconds': seconds, 'mean': seconds / calls if calls else float('nan')}
+            for label, (calls, seconds) in self.timers.items()
+        }
+        queues = {'time': np.array([t for t, _ in self.samples], dtype=float)}
+        for name in (self.samples[0][1] if self.samples else {}):
+            queues[name] = np.array([lengths[name] for _, lengths in self.samples])
+        return {'timers': timers, 'queues': queues}
+
+    def summary(self) -> str:
+        lines = [f"{'method':<28} {'calls':>10} {'seconds':>10} {'mean (us)':>10}"]
+        for label, timer in sorted(self.report()['timers'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{label:<28} {timer['calls']:>10} {timer['seconds']:>10.3f} {timer['mean'] * 1e6:>10.1f}")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"Profiler(timers={len(self.timers)},samples={len(self.samples)})"
@@ -0,0 +1,107 @@
+import os
+import math, statistics
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+def run_replications(
+    runner:Callable,
+    replications:int,
+    seed:int=None,
+    workers:int=None,
+    confidence:float=0.95
+) -> dict:
+    """
+        Usage: Run 'replications' independent replications of a stochastic simulation and aggregate their KPIs.
+        Every replication gets its own child of np.random.SeedSequence(seed), so replications never share a
+        random stream and the whole experiment is reproduced by the same 'seed', whatever the number of workers.
+
+        Arguments:
+        -runner: picklable callable (module level function or functools.partial of one) taking a SeedSequence,
+        seeding its simulation's generator with it, and returning a dictionary of numeric KPIs.
+        -replications: number of replications.
+        -seed: Optional, root seed for the SeedSequence. If ommitted, fresh entropy is used.
+        -workers: Optional, number of worker processes. Defaults to os.cpu_count(), 1 runs everything in-process.
+        -confidence: confidence level of the intervals returned in the summary.
+
+        Returns: {'replications': list of KPI dictionaries (in seed order), 'summary': summarise(...) output}
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    workers = min(workers if workers else os.cpu_count() or 1, replications)
+    if workers <= 1:
+        results = [runner(s) for s in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                runner,
+                seeds,
+                chunksize=max(1, replications // (workers * 4))
+            ))
+    return {
+        'replications': results,
+        'summary': summarise(results, confidence)
+    }
+
+def summarise(results:list, confidence:float=0.95) -> dict:
+    """
+        Usage: Aggregate a list of KPI dictionaries into mean, standard deviation and a Student-t confidence
+        interval for every KPI. NaN values (e.g. ASA of a replication with no handled contact) are ignored.
+    """
+    summary = dict()
+    for kpi in (results[0].keys() if results else []):
+        values = np.array([r[kpi] for r in results], dtype=float)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        mean = values.mean() if n else float('nan')
+        std = values.std(ddof=1) if n > 1 else float('nan')
+        half_width = t_quantile((1 + confidence) / 2, n - 1) * std / np.sqrt(n) if n > 1 else float('nan')
+        summary[kpi] = {
+            'mean': float(mean),
+            'std': float(std),
+            'ci_low': float(mean - half_width),
+            'ci_high': float(mean + half_width),
+            'half_width': float(half_width),
+            'n': n
+        }
+    return summary
+
+def t_quantile(p:float, df:int) -> float:
+    """
+        Usage: Student-t quantile. Closed forms for df = 1, 2 and 4, otherwise the normal quantile expansion
+        (Abramowitz & Stegun 26.7.5) refined by Newton steps on the exact CDF (see '_t_cdf'), accurate to ~1e-10.
+    """
+    if df < 1:
+        return float('nan')
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    if df == 4:
+        alpha = 4 * p * (1 - p)
+        q = math.cos(math.acos(math.sqrt(alpha)) / 3) / math.sqrt(alpha)
+        return math.copysign(2 * math.sqrt(q - 1), p - 0.5)
+    z = statistics.NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    t = z + g1 / df + g2 / df**2 + g3 / df**3 + g4 / df**4
+    log_norm = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+    for _ in range(4):
+        pdf = math.exp(log_norm - (df + 1) / 2 * math.log1p(t**2 / df))
+        t -= (_t_cdf(t, df) - p) / pdf
+    return t
+
+def _t_cdf(t:float, df:int) -> float:
+    # Exact Student-t CDF for integer df (Abramowitz & Stegun 26.7.3 / 26.7.4), with theta = atan(t / sqrt(df))
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta)**2
+    term, total = 1.0, 1.0
+    for k in range(1 + df % 2, df - 2, 2):
+        term *= k / (k + 1) * cos2
+        total += term
+    if df % 2:
+        a = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total) if df > 1 else 2 * theta / math.pi
+    else:
+        a = math.sin(theta) * total
+    return 0.5 + a / 2
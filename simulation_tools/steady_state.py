@@ -0,0 +1,54 @@
+import numpy as np
+
+from .replications import t_quantile
+
+def mser(series) -> int:
+    """
+        Usage: MSER warm-up truncation point of a series of per-interval observations: the number of leading
+        observations d (at most half of the series) minimising sum((x[d:] - mean(x[d:]))^2) / (n - d)^2.
+        NaN observations are treated as missing.
+    """
+    values = np.asarray(series, dtype=float)
+    observed = ~np.isnan(values)
+    n = len(values)
+    if observed.sum() < 2:
+        return 0
+    # Suffix sums over the observed values (d = 0 .. n // 2)
+    counts = np.cumsum(observed[::-1])[::-1]
+    sums = np.cumsum(np.where(observed, values, 0)[::-1])[::-1]
+    squares = np.cumsum(np.where(observed, values**2, 0)[::-1])[::-1]
+    candidates = np.arange(n // 2 + 1)
+    counts, sums, squares = counts[candidates], sums[candidates], squares[candidates]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        statistic = (squares - sums**2 / counts) / counts**2
+    statistic[counts < 2] = np.inf
+    return int(np.argmin(statistic))
+
+def steady_state(series, precision:float, confidence:float=0.95, min_observations:int=5) -> dict:
+    """
+        Usage: Steady-state estimate of a series of per-interval observations after MSER truncation, and whether it
+        is stable to 'precision': the confidence interval half-width of the truncated mean is at most 'precision'
+        times the mean (relative precision).
+
+        Arguments:
+        -series: per-interval observations (NaN for intervals without observation).
+        -precision: relative half-width, e.g. 0.05 for +-5%.
+        -confidence: confidence level of the half-width.
+        -min_observations: observations needed after truncation before convergence can be declared.
+
+        Returns: {'warmup': truncated leading intervals, 'mean', 'half_width', 'observations', 'converged'}
+    """
+    values = np.asarray(series, dtype=float)
+    warmup = mser(values)
+    kept = values[warmup:]
+    kept = kept[~np.isnan(kept)]
+    n = len(kept)
+    mean = float(kept.mean()) if n else float('nan')
+    half_width = float(t_quantile((1 + confidence) / 2, n - 1) * kept.std(ddof=1) / np.sqrt(n)) if n > 1 else float('nan')
+    return {
+        'warmup': warmup,
+        'mean': mean,
+        'half_width': half_width,
+        'observations': n,
+        'converged': bool(n >= min_observations and half_width <= precision * abs(mean))
+    }